@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Dict
 
 from rlbot.agents.base_agent import BaseAgent, GameTickPacket, SimpleControllerState
 
@@ -7,18 +7,30 @@ from maneuvers.maneuver import Maneuver
 from rlutilities.linear_algebra import vec3
 from rlutilities.simulation import Input
 from strategy.soccar_strategy import SoccarStrategy
+from tools.background_planner import BackgroundPlanner
+from tools.ball_prediction import LOCAL_RLUTILITIES, MULTI_RESOLUTION, SHARED_MEMORY
 from tools.drawing import DrawingTool
 from tools.game_info import GameInfo
+from tools.shared_prediction import SharedPrediction
+from tools.tick_budget import TickBudget
 
 
 class BotimusPrime(BaseAgent):
     RENDERING = True
+    PREDICTION_SOURCE = LOCAL_RLUTILITIES  # or FRAMEWORK_STRUCT, to skip simulating the ball locally
+    PREDICTION_RESOLUTION = MULTI_RESOLUTION
+    BACKGROUND_PLANNING = False  # prepare the next maneuver in a worker thread, see BackgroundPlanner
+    SHARED_PREDICTION = False  # share the ball prediction with teammates running in other processes
 
     def __init__(self, name, team, index):
         super().__init__(name, team, index)
         self.info: GameInfo = None
         self.draw: DrawingTool = None
         self.strategy: SoccarStrategy = None
+        self.planner: Optional[BackgroundPlanner] = None
+        self.shared_prediction: Optional[SharedPrediction] = None
+        self.budget = TickBudget()
+        self._strategies: Dict[int, SoccarStrategy] = {}
 
         self.tick_counter = 0
         self.last_latest_touch_time = 0
@@ -27,10 +39,42 @@ class BotimusPrime(BaseAgent):
         self.controls: SimpleControllerState = SimpleControllerState()
 
     def initialize_agent(self):
-        self.info = GameInfo(self.team)
-        self.info.set_mode("soccar")
+        if self.SHARED_PREDICTION:
+            self.shared_prediction = SharedPrediction.connect(SharedPrediction.segment_name(self.team))
+            if self.shared_prediction is None:
+                self.logger.warning("Couldn't map the shared prediction, predicting the ball locally")
+
+        self.info = self.create_info()
         self.draw = DrawingTool(self.renderer, self.team)
-        self.strategy = SoccarStrategy(self.info)
+        self.strategy = self._strategies[id(self.info)]
+
+        if self.BACKGROUND_PLANNING:
+            self.planner = BackgroundPlanner(self.create_info(), self.plan)
+            self.planner.start()
+
+    def create_info(self) -> GameInfo:
+        info = GameInfo(self.team)
+        info.set_mode("soccar")
+        self.configure_prediction(info)
+        info.prediction_resolution = self.PREDICTION_RESOLUTION
+        self._strategies[id(info)] = SoccarStrategy(info)
+        return info
+
+    def configure_prediction(self, info: GameInfo):
+        if self.shared_prediction is not None and not self.shared_prediction.publisher:
+            info.set_prediction_source(SHARED_MEMORY, shared_prediction=self.shared_prediction)
+        else:
+            info.set_prediction_source(self.PREDICTION_SOURCE, self.get_ball_prediction_struct)
+
+    def plan(self, info: GameInfo) -> Maneuver:
+        return self._strategies[id(info)].choose_maneuver(info.cars[self.index])
+
+    def retire(self):
+        if self.planner is not None:
+            self.planner.stop()
+        if self.shared_prediction is not None:
+            self.shared_prediction.close()
+        self.logger.info(self.budget.report())
 
     def get_output(self, packet: GameTickPacket):
         # wait a few ticks after initialization, so we work correctly in rlbottraining
@@ -38,11 +82,25 @@ class BotimusPrime(BaseAgent):
             self.tick_counter += 1
             return Input()
 
-        self.info.read_packet(packet, self.get_field_info())
+        budget = self.budget
+        budget.start_tick()
+
+        with budget.phase(TickBudget.PACKET):
+            field_info = self.get_field_info()
+            self.info.read_packet(packet, field_info)
+
+        # the publishing bot predicts every tick, for the whole team, so always the full horizon,
+        # even if its own planning is degraded to a shorter one
+        if self.shared_prediction is not None and self.shared_prediction.publisher:
+            with budget.phase(TickBudget.PREDICTION):
+                self.info.predict_ball(time_limit=GameInfo.PREDICTION_HORIZON)
+                self.shared_prediction.publish(self.info)
 
         # cancel maneuver if a kickoff is happening and current maneuver isn't a kickoff maneuver
         if packet.game_info.is_kickoff_pause and not isinstance(self.maneuver, Kickoff):
             self.maneuver = None
+            if self.planner is not None:
+                self.planner.invalidate()
 
         # reset maneuver when another car hits the ball
         touch = packet.game_ball.latest_touch
@@ -51,6 +109,8 @@ class BotimusPrime(BaseAgent):
             and touch.player_name != packet.game_cars[self.index].name
         ):
             self.last_latest_touch_time = touch.time_seconds
+            if self.planner is not None:
+                self.planner.invalidate()
 
             # don't reset when we're dodging, wavedashing or recovering
             if self.maneuver and self.maneuver.interruptible():
@@ -61,27 +121,67 @@ class BotimusPrime(BaseAgent):
 
             if self.RENDERING:
                 self.draw.clear()
-            
-            self.info.predict_ball()
-            self.maneuver = self.strategy.choose_maneuver(self.info.cars[self.index])
-        
+
+            # adopt the background proposal, it has been planned on the other GameInfo
+            proposal = self.planner.take(self.info, packet) if self.planner is not None else None
+            if proposal is not None:
+                self.info = proposal.info
+                self.strategy = self._strategies[id(self.info)]
+                self.configure_prediction(self.info)
+                self.info.read_packet(packet, field_info)
+                self.maneuver = proposal.maneuver
+            else:
+                with budget.phase(TickBudget.PREDICTION):
+                    # the publisher keeps the full horizon it predicted for the team anyway
+                    publishing = self.shared_prediction is not None and self.shared_prediction.publisher
+                    shorten = not publishing and budget.degrades(TickBudget.SHORTEN_PREDICTION)
+                    self.info.prediction_horizon = GameInfo.SHORT_PREDICTION_HORIZON if shorten \
+                        else GameInfo.PREDICTION_HORIZON
+                    self.info.predict_ball()
+
+                with budget.phase(TickBudget.STRATEGY):
+                    self.maneuver = self.plan(self.info)
+
+        rendering = self.RENDERING and not budget.degrades(TickBudget.SKIP_RENDERING)
+
         # execute maneuver
         if self.maneuver is not None:
-            self.maneuver.step(self.info.time_delta)
-            self.controls = self.maneuver.controls
-
-            if self.RENDERING:
-                self.draw.group("maneuver")
-                self.draw.color(self.draw.yellow)
-                self.draw.string(self.info.cars[self.index].position + vec3(0, 0, 50), type(self.maneuver).__name__)
-                self.maneuver.render(self.draw)
+            with budget.phase(TickBudget.MANEUVERS):
+                self.info.postpone_intercept_updates = budget.degrades(TickBudget.POSTPONE_INTERCEPT_REFRESH)
+                self.maneuver.step(self.info.time_delta)
+                self.controls = self.maneuver.controls
+
+            if rendering:
+                with budget.phase(TickBudget.RENDERING):
+                    self.draw.group("maneuver")
+                    self.draw.color(self.draw.yellow)
+                    self.draw.string(self.info.cars[self.index].position + vec3(0, 0, 50),
+                                     type(self.maneuver).__name__)
+                    self.maneuver.render(self.draw)
 
             # cancel maneuver when finished
             if self.maneuver.finished:
                 self.maneuver = None
 
-        if self.RENDERING:
-            self.draw.execute()
+        if rendering:
+            with budget.phase(TickBudget.RENDERING):
+                self.draw.execute()
+
+        budget.end_tick()
+
+        # plan the next maneuver in the background, only in ticks that leave time to spare,
+        # and only while the current maneuver could be replaced by it
+        if (
+            self.planner is not None
+            and self.maneuver is not None
+            and self.maneuver.interruptible()
+            and budget.level == 0
+            and not self.planner.has_fresh_proposal(packet)
+        ):
+            self.planner.request(packet, field_info)
+
+        if budget.report_due():
+            self.logger.info(budget.report())
 
         return self.controls
 
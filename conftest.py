@@ -0,0 +1,9 @@
+"""
+Lets pytest import the bot's packages when it's run from the repository root:
+
+    python -m pytest tests/offline
+
+The tests in tests/offline check parts of the bot without a running game. Those that need RLUtilities
+are skipped where it can't be loaded, e.g. on other platforms than Windows.
+The other folders in tests/ hold scenarios for tests/run_unit_tests.py, which runs them in the game.
+"""
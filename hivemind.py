@@ -10,12 +10,17 @@ from maneuvers.general_defense import GeneralDefense
 from maneuvers.refuel import Refuel
 from rlutilities.linear_algebra import vec3
 from strategy.hivemind_strategy import HivemindStrategy
+from tools.ball_prediction import LOCAL_RLUTILITIES, MULTI_RESOLUTION
 from tools.drawing import DrawingTool
 from tools.drone import Drone
 from tools.game_info import GameInfo
+from tools.tick_budget import TickBudget
 
 
 RELEASE = True
+PREDICTION_SOURCE = LOCAL_RLUTILITIES  # or FRAMEWORK_STRUCT, to skip simulating the ball locally
+PREDICTION_RESOLUTION = MULTI_RESOLUTION
+PLANNED_DRONES_PER_TICK = 1  # the other drones hold their course for a few ticks, None starts all maneuvers at once
 
 class Beehive(PythonHivemind):
     def __init__(self, *args):
@@ -27,6 +32,7 @@ class Beehive(PythonHivemind):
         self.strategy: HivemindStrategy = None
 
         self.last_latest_touch_time = 0.0
+        self.budget = TickBudget()
 
     def initialize_hive(self, packet: GameTickPacket) -> None:
         index = next(iter(self.drone_indices))
@@ -34,7 +40,10 @@ class Beehive(PythonHivemind):
 
         self.info = GameInfo(self.team)
         self.info.set_mode("soccar")
+        self.info.set_prediction_source(PREDICTION_SOURCE, self.get_ball_prediction_struct)
+        self.info.prediction_resolution = PREDICTION_RESOLUTION
         self.strategy = HivemindStrategy(self.info, self.logger)
+        self.strategy.max_planned_per_tick = PLANNED_DRONES_PER_TICK
         self.draw = DrawingTool(self.renderer, self.team)
         self.drones = [Drone(self.info.cars[i], i) for i in self.drone_indices]
 
@@ -43,7 +52,11 @@ class Beehive(PythonHivemind):
         self.logger.info("Beehive initialized")
 
     def get_outputs(self, packet: GameTickPacket) -> Dict[int, PlayerInput]:
-        self.info.read_packet(packet, self.get_field_info())
+        budget = self.budget
+        budget.start_tick()
+
+        with budget.phase(TickBudget.PACKET):
+            self.info.read_packet(packet, self.get_field_info())
 
         # if a kickoff is happening and none of the drones have a Kickoff maneuver active, reset all drone maneuvers
         if (
@@ -67,30 +80,59 @@ class Beehive(PythonHivemind):
                 drone.maneuver = None
 
         # if at least one drone doesn't have an active maneuver, execute strategy code
-        if None in [drone.maneuver for drone in self.drones]:
-            self.logger.debug("Setting maneuvers")
-            self.strategy.set_maneuvers(self.drones)
+        if self.strategy.needs_planning(self.drones):
+            # the ball is only predicted when the strategy has a striker to pick
+            with budget.phase(TickBudget.PREDICTION):
+                shorten = budget.degrades(TickBudget.SHORTEN_PREDICTION)
+                self.info.prediction_horizon = GameInfo.SHORT_PREDICTION_HORIZON if shorten \
+                    else GameInfo.PREDICTION_HORIZON
+                if self.strategy.needs_prediction(self.drones):
+                    self.info.predict_ball()
+
+            with budget.phase(TickBudget.STRATEGY):
+                self.logger.debug("Setting maneuvers")
+                self.strategy.set_maneuvers(self.drones)
+
+        # drones holding their course get the maneuvers that were planned for them, without planning again
+        elif self.strategy.has_pending_maneuvers():
+            with budget.phase(TickBudget.STRATEGY):
+                self.strategy.start_pending_maneuvers()
+
+        rendering = not budget.degrades(TickBudget.SKIP_RENDERING)
+        self.info.postpone_intercept_updates = budget.degrades(TickBudget.POSTPONE_INTERCEPT_REFRESH)
 
         for drone in self.drones:
             if drone.maneuver is None:
                 continue
 
             # execute maneuvers
-            drone.maneuver.step(self.info.time_delta)
-            drone.controls = drone.maneuver.controls
+            with budget.phase(TickBudget.MANEUVERS):
+                drone.maneuver.step(self.info.time_delta)
+                drone.controls = drone.maneuver.controls
 
-            drone.maneuver.render(self.draw)
+            if rendering:
+                with budget.phase(TickBudget.RENDERING):
+                    drone.maneuver.render(self.draw)
 
-            # draw names of maneuvers above our drones
-            self.draw.color(self.draw.yellow)
-            self.draw.string(drone.car.position + vec3(0, 0, 50), type(drone.maneuver).__name__)
+                    # draw names of maneuvers above our drones
+                    self.draw.color(self.draw.yellow)
+                    self.draw.string(drone.car.position + vec3(0, 0, 50), type(drone.maneuver).__name__)
 
             # expire finished maneuvers
             if drone.maneuver.finished:
                 drone.maneuver = None
 
-        self.strategy.avoid_demos_and_team_bumps(self.drones)
+        with budget.phase(TickBudget.COLLISIONS):
+            reuse_collisions = budget.degrades(TickBudget.REUSE_COLLISIONS)
+            self.strategy.avoid_demos_and_team_bumps(self.drones, reuse_collisions)
+
+        if rendering:
+            with budget.phase(TickBudget.RENDERING):
+                self.strategy.render(self.draw)
+                self.draw.execute()
+
+        budget.end_tick()
+        if budget.report_due():
+            self.logger.info(budget.report())
 
-        self.strategy.render(self.draw)
-        self.draw.execute()
         return {drone.index: drone.get_player_input() for drone in self.drones}
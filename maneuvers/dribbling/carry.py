@@ -1,8 +1,11 @@
+from typing import Optional
+
 from maneuvers.maneuver import Maneuver
 from maneuvers.driving.drive import Drive
 from rlutilities.linear_algebra import vec3, norm, normalize
 from rlutilities.simulation import Car, Ball
 from tools.drawing import DrawingTool
+from tools.game_info import GameInfo
 from tools.math import clamp, sign
 from tools.vector_math import distance, ground_distance, direction, local, ground, world
 
@@ -11,22 +14,31 @@ class Carry(Maneuver):
     """
     Carry the ball on roof towards a target.
     Finishes if the ball hits the floor.
+    With `info`, where the ball comes down is looked up in the shared ball prediction,
+    and only simulated here when the prediction is stale.
     """
-    def __init__(self, car: Car, ball: Ball, target: vec3):
+
+    CONTACT_HEIGHT = 120
+
+    def __init__(self, car: Car, ball: Ball, target: vec3, info: Optional[GameInfo] = None):
         super().__init__(car)
 
         self.ball = ball
+        self.info = info
         self.target = ground(target)
         self.drive = Drive(car)
         self._shift_direction = vec3(0, 0, 0)
 
     def step(self, dt):
-        ball = Ball(self.ball)
         car = self.car
+        ball = self.info.next_ground_contact(self.CONTACT_HEIGHT) if self.info is not None else None
+
+        if ball is None:
+            ball = Ball(self.ball)
 
-        # simulate ball until it gets near the floor
-        while (ball.position[2] > 120 or ball.velocity[2] > 0) and ball.time < car.time + 10:
-            ball.step(1/60)
+            # simulate ball until it gets near the floor
+            while (ball.position[2] > self.CONTACT_HEIGHT or ball.velocity[2] > 0) and ball.time < car.time + 10:
+                ball.step(1/60)
 
         ball_local = local(car, ground(ball.position))
         target = local(car, self.target)
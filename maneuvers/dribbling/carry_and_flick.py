@@ -19,7 +19,7 @@ class CarryAndFlick(Maneuver):
         self.target = target
         self.info = info
 
-        self.carry = Carry(car, info.ball, target)
+        self.carry = Carry(car, info.ball, target, info)
         self.flick = AirDodge(car, 0.15, info.ball.position)
         self.flicking = False
 
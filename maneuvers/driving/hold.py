@@ -0,0 +1,40 @@
+from maneuvers.driving.drive import Drive
+from maneuvers.maneuver import Maneuver
+from rlutilities.linear_algebra import vec3, norm, dot
+from rlutilities.simulation import Car
+from tools.arena import Arena
+from tools.drawing import DrawingTool
+from tools.vector_math import ground
+
+
+class Hold(Maneuver):
+    """
+    Cheap placeholder for a car that is waiting for the strategy to plan for it.
+    Keep driving in the current direction at the current speed, or towards our goal when standing still.
+    The strategy replaces it, it only finishes when the car leaves the ground, so that the car gets a Recovery.
+    """
+
+    HEADING_TIME = 1.0
+    MIN_SPEED = 500
+
+    def __init__(self, car: Car, fallback_target: vec3):
+        super().__init__(car)
+
+        speed = norm(car.velocity)
+        if speed > self.MIN_SPEED:
+            target = ground(car.position + car.velocity * self.HEADING_TIME)
+        else:
+            target = ground(fallback_target)
+
+        self.drive = Drive(car, Arena.clamp(target, 500), max(dot(car.velocity, car.forward()), self.MIN_SPEED))
+
+    def step(self, dt):
+        if not self.car.on_ground:
+            self.finished = True
+
+        self.drive.step(dt)
+        self.controls = self.drive.controls
+        self.controls.boost = 0
+
+    def render(self, draw: DrawingTool):
+        self.drive.render(draw)
@@ -29,7 +29,8 @@ class Travel(Maneuver):
         self._time_on_ground = 0
         self.driving = True
 
-        # decide whether to start driving backwards and halfflip later
+        # decide whether to start driving backwards and halfflip later,
+        # both estimates pass a speed, so they come from the same heuristic
         forward_estimate = estimate_time(car, self.target, estimate_max_car_speed(car))
         backwards_estimate = estimate_time(car, self.target, 1400, -1) + 0.5
         backwards = (
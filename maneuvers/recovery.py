@@ -4,6 +4,7 @@ from maneuvers.maneuver import Maneuver
 from rlutilities.linear_algebra import vec3, dot, norm, angle_between, normalize, cross, mat3, look_at, xy
 from rlutilities.mechanics import AerialTurn
 from rlutilities.simulation import Car, Input, sphere, Field
+from tools.arena import Arena
 from tools.drawing import DrawingTool
 from tools.vector_math import forward, three_vec3_to_mat3
 
@@ -11,6 +12,12 @@ from tools.vector_math import forward, three_vec3_to_mat3
 class Recovery(Maneuver):
     """Boost down and try to land smoothly"""
 
+    COLLISION_RADIUS = 50
+    CONTACT_MARGIN = 10
+    MIN_LANDING_TIME = 0.35
+    MAX_LANDING_TIME = 0.8
+    FALLBACK_DT = 1 / 60
+
     def __init__(self, car: Car, jump_when_upside_down=True):
         super().__init__(car)
 
@@ -18,7 +25,7 @@ class Recovery(Maneuver):
         self.landing = False
         self.aerial_turn = AerialTurn(self.car)
 
-        self.trajectory: List[vec3] = []
+        self.landing_time = 0.0
         self.landing_pos: Optional[vec3] = None
 
     def interruptible(self) -> bool:
@@ -46,31 +53,38 @@ class Recovery(Maneuver):
             self.finished = self.car.on_ground
 
     def simulate_landing(self):
-        pos = vec3(self.car.position)
-        vel = vec3(self.car.velocity)
-        grav = vec3(0, 0, -650)
-        self.trajectory = [vec3(pos)]
+        """
+        Find where the car lands if it keeps flying ballistically, solved analytically against the
+        surfaces of the arena. Field.collide confirms the contacts, earliest first, and gives the exact normal
+        where the surfaces are curved. When it confirms none of them, e.g. in or near a goal,
+        the trajectory is stepped through and tested with Field.collide instead.
+        """
         self.landing = False
         collision_normal: Optional[vec3] = None
-
-        dt = 1/60
-        simulation_duration = 0.8
-        for i in range(int(simulation_duration / dt)):
-            pos += vel * dt
-            vel += grav * dt
-            if norm(vel) > 2300: vel = normalize(vel) * 2300
-            self.trajectory.append(vec3(pos))
-
-            collision_sphere = sphere(pos, 50)
-            collision_ray = Field.collide(collision_sphere)
-            collision_normal = collision_ray.direction
-
-            if (norm(collision_normal) > 0.0 or pos[2] < 0) and i > 20:
+        contacts = Arena.ballistic_contacts(self.car.position, self.car.velocity, self.COLLISION_RADIUS,
+                                            self.MIN_LANDING_TIME, self.MAX_LANDING_TIME)
+        for time, position, _ in contacts:
+            collision_ray = Field.collide(sphere(position, self.COLLISION_RADIUS + self.CONTACT_MARGIN))
+            if norm(collision_ray.direction) > 0.0:
+                self.landing_time, self.landing_pos = time, position
+                collision_normal = collision_ray.direction
                 self.landing = True
-                self.landing_pos = pos
                 break
 
+        if not self.landing:
+            time = self.MIN_LANDING_TIME
+            while time <= self.MAX_LANDING_TIME:
+                position = self.car.position + self.car.velocity * time + vec3(0, 0, Arena.GRAVITY / 2) * time ** 2
+                collision_ray = Field.collide(sphere(position, self.COLLISION_RADIUS))
+                if norm(collision_ray.direction) > 0.0:
+                    self.landing_time, self.landing_pos = time, position
+                    collision_normal = collision_ray.direction
+                    self.landing = True
+                    break
+                time += self.FALLBACK_DT
+
         if self.landing:
+            vel = self.car.velocity + vec3(0, 0, Arena.GRAVITY) * self.landing_time
             u = collision_normal
             f = normalize(vel - dot(vel, u) * u)
             l = normalize(cross(u, f))
@@ -79,10 +93,16 @@ class Recovery(Maneuver):
             target_direction = normalize(normalize(self.car.velocity) - vec3(0, 0, 3))
             self.aerial_turn.target = look_at(target_direction, vec3(0, 0, 1))
 
+    def trajectory(self, dt=1/60) -> List[vec3]:
+        """Ballistic path of the car until it lands, only built for rendering."""
+        steps = int(self.landing_time / dt) + 1
+        return [self.car.position + self.car.velocity * (dt * i) + vec3(0, 0, Arena.GRAVITY / 2) * (dt * i) ** 2
+                for i in range(steps)] + [self.landing_pos]
+
     def render(self, draw: DrawingTool):
         if self.landing:
             draw.color(draw.cyan)
-            draw.polyline(self.trajectory)
+            draw.polyline(self.trajectory())
 
             if self.landing_pos:
                 draw.crosshair(self.landing_pos)
@@ -7,28 +7,36 @@ from rlutilities.linear_algebra import vec3, norm
 from rlutilities.simulation import Car, Pad
 from tools.drawing import DrawingTool
 from tools.game_info import GameInfo
-from tools.intercept import estimate_max_car_speed, estimate_time
+from tools.intercept import estimate_time
 from tools.vector_math import distance
 
 
 class Refuel(Maneuver):
     """
-    Choose a large boost pad and go pick it up.
+    Choose a large boost pad and go pick it up. A `pad` chosen by the caller is picked up instead.
     """
 
-    def __init__(self, car: Car, info: GameInfo, target: vec3, forbidden_pads: Set[Pad] = set()):
+    def __init__(self, car: Car, info: GameInfo, target: vec3, forbidden_pads: Set[Pad] = set(),
+                 pad: Optional[Pad] = None):
         super().__init__(car)
         self.info = info
 
-        pos = (target + car.position * 2 + info.my_goal.center * 2) / 5  # TODO: make this better
-
-        pads = set(info.large_boost_pads) - forbidden_pads
-        self.pad = self.best_boostpad_to_pickup(car, pads, pos)
+        if pad is not None:
+            self.pad = pad
+        else:
+            pos = self.pickup_position(car, info, target)
+            pads = set(info.large_boost_pads) - forbidden_pads
+            self.pad = self.best_boostpad_to_pickup(car, pads, pos)
 
         self.pad_was_active = self.pad and self.pad.is_active
 
         self.travel = Travel(car, self.pad.position if self.pad else info.my_goal.center, waste_boost=True)
 
+    @staticmethod
+    def pickup_position(car: Car, info: GameInfo, target: vec3) -> vec3:
+        """The pad nearest to this position is preferred."""
+        return (target + car.position * 2 + info.my_goal.center * 2) / 5  # TODO: make this better
+
     @staticmethod
     def best_boostpad_to_pickup(car: Car, pads: Set[Pad], pos: vec3) -> Optional[Pad]:
         best_pad = None
@@ -36,7 +44,7 @@ class Refuel(Maneuver):
 
         for pad in pads:
             dist = distance(pos, pad.position)
-            time_estimate = estimate_time(car, pad.position, estimate_max_car_speed(car))
+            time_estimate = estimate_time(car, pad.position)
 
             if dist < best_dist and (pad.is_active or pad.timer < time_estimate):
                 best_pad = pad
@@ -1,17 +1,41 @@
-from typing import List
+import math
+from typing import List, Tuple, Optional
+
+import numpy as np
 
 from maneuvers.strikes.strike import Strike
 from rlutilities.linear_algebra import vec3, norm, normalize, look_at, axis_to_rotation, dot
 from rlutilities.mechanics import Aerial
-from rlutilities.simulation import Car, Ball
+from rlutilities.simulation import Car
+from tools.aerial_table import AerialTable, SINGLE_JUMP, DOUBLE_JUMP, BOOST_USAGE
+from tools.ball_prediction import BallPrediction
 from tools.drawing import DrawingTool
 from tools.game_info import GameInfo
 from tools.intercept import Intercept
-from tools.math import range_map
+from tools.predicates import HeightBand, MinimumTime
 from tools.vector_math import ground_direction, angle_to, distance, ground_distance, direction
 
 
+# simulated aerials, used to skip simulating hopeless takeoffs once tools/aerial_table.py has been run
+AERIAL_TABLE: Optional[AerialTable] = AerialTable.load()
+
+
 class AerialStrike(Strike):
+    """
+    Drive towards the intercept and take off when a simulated aerial from the current state reaches the target.
+
+    Simulated outcomes are cached in GameInfo.flight_errors by the car state relative to the aerial target,
+    quantized, so states that were already simulated, e.g. by a strike planned before for the same target,
+    aren't simulated again. A simulation stops as soon as the car can't get close enough to the target anymore.
+    Simulations aren't warm started from the previous tick's flight: each one starts with a takeoff
+    from the current state, and since the car kept driving instead, none of the previous flight lies on it.
+    The flight path drawn by `render` is the one of the last simulation from the car's own state
+    that missed the cache, so rendering doesn't simulate anything.
+
+    With the aerial table generated (see tools/aerial_table.py), takeoffs it rules out aren't simulated,
+    and strike candidates are filtered with it.
+    """
+
     MAX_DISTANCE_ERROR = 50
     DELAY_TAKEOFF = True
     MINIMAL_HEIGHT = 500
@@ -20,6 +44,29 @@ class AerialStrike(Strike):
     MAXIMAL_HEIGHT_TIME = 1.5
     DOUBLE_JUMP = False
 
+    intercept_predicate = (
+        HeightBand(MINIMAL_HEIGHT, MAXIMAL_HEIGHT)
+        & MinimumTime(MINIMAL_HEIGHT, MAXIMAL_HEIGHT, MINIMAL_HEIGHT_TIME, MAXIMAL_HEIGHT_TIME)
+    )
+
+    # quantization of the cache keys
+    POSITION_STEP = 10
+    VELOCITY_STEP = 10
+    DIRECTION_STEP = 0.01
+    TIME_STEP = 1 / 120
+    BOOST_STEP = 2  # the simulation depletes boost from the car's, so running out of it is part of the outcome
+    FLIGHT_CACHE_SIZE = 4096
+
+    # bounds for stopping a simulation early, they hold once the car is done jumping
+    JUMP_DURATION = 0.3
+    MAX_AIR_ACCELERATION = 1100  # boost and throttle
+    MAX_SPEED = 2300
+    MISS_CHECK_INTERVAL = 8  # steps
+
+    # the table is interpolated, only trust it when it's off by this much more
+    TABLE_MARGIN = 150
+    TABLE_MAX_ANGLE = 0.3  # the table assumes the car faces the target
+
     def __init__(self, car: Car, info: GameInfo, target: vec3 = None):
         self.aerial = Aerial(car)
         self.aerial.angle_threshold = 0.8
@@ -31,21 +78,63 @@ class AerialStrike(Strike):
         self.too_early = False
         self._flight_path: List[vec3] = []
 
-    def intercept_predicate(self, car: Car, ball: Ball):
-        required_time = range_map(ball.position[2],
-                                  self.MINIMAL_HEIGHT,
-                                  self.MAXIMAL_HEIGHT,
-                                  self.MINIMAL_HEIGHT_TIME,
-                                  self.MAXIMAL_HEIGHT_TIME)
-        return self.MINIMAL_HEIGHT < ball.position[2] < self.MAXIMAL_HEIGHT and ball.time - car.time > required_time
-
     def configure(self, intercept: Intercept):
         super().configure(intercept)
         self.aerial.target = intercept.position - direction(intercept, self.target) * 100
         self.aerial.up = normalize(ground_direction(intercept, self.car) + vec3(0, 0, 0.5))
         self.aerial.arrival_time = intercept.time
 
-    def simulate_flight(self, car: Car, write_to_flight_path=True) -> Car:
+    @classmethod
+    def possible_slices(cls, car: Car, ball_predictions: BallPrediction) -> Optional[np.ndarray]:
+        if AERIAL_TABLE is None:
+            return None
+        return AERIAL_TABLE.possible_slices(car, ball_predictions, DOUBLE_JUMP if cls.DOUBLE_JUMP else SINGLE_JUMP,
+                                            cls.MAX_DISTANCE_ERROR + cls.TABLE_MARGIN)
+
+    def flight_error(self, car: Car) -> float:
+        """
+        Distance between the car and the aerial target at the end of an aerial from the given state,
+        infinite if it's clear early on that it's more than MAX_DISTANCE_ERROR.
+        """
+        if self._table_rules_out(car):
+            return math.inf
+
+        cache = self.info.flight_errors
+        key = self._flight_key(car)
+        error = cache.get(key)
+        if error is None:
+            simulated_car = self.simulate_flight(car, write_to_flight_path=car is self.car, stop_on_miss=True)
+            error = distance(simulated_car, self.aerial.target) if simulated_car is not None else math.inf
+
+            if len(cache) >= self.FLIGHT_CACHE_SIZE:
+                cache.clear()
+            cache[key] = error
+
+        return error
+
+    def _table_rules_out(self, car: Car) -> bool:
+        if AERIAL_TABLE is None or not car.on_ground or angle_to(car, self.aerial.target) > self.TABLE_MAX_ANGLE:
+            return False
+        jump = SINGLE_JUMP if self.aerial.single_jump else DOUBLE_JUMP
+        error = AERIAL_TABLE.car_error(car, self.aerial.target, self.aerial.arrival_time, jump)
+        return error > self.MAX_DISTANCE_ERROR + self.TABLE_MARGIN
+
+    def _flight_key(self, car: Car) -> Tuple:
+        aerial = self.aerial
+        offset = aerial.target - car.position
+        forward, up, aerial_up = car.forward(), car.up(), aerial.up
+        return (
+            tuple(round(x / self.POSITION_STEP) for x in (offset[0], offset[1], offset[2], car.position[2])),
+            tuple(round(car.velocity[i] / self.VELOCITY_STEP) for i in range(3)),
+            tuple(round(v[i] / self.DIRECTION_STEP) for v in (forward, up, aerial_up) for i in range(3)),
+            round(car.angular_velocity[2] / self.DIRECTION_STEP),
+            round((aerial.arrival_time - car.time) / self.TIME_STEP),
+            round(car.boost / self.BOOST_STEP),
+            car.on_ground, aerial.single_jump, aerial.angle_threshold,
+        )
+
+    def simulate_flight(self, car: Car, write_to_flight_path=False, stop_on_miss=False) -> Optional[Car]:
+        """With `stop_on_miss`, returns None as soon as the car can't end up near the target anymore."""
         test_car = Car(car)
         test_aerial = Aerial(test_car)
         test_aerial.target = self.aerial.target
@@ -57,16 +146,46 @@ class AerialStrike(Strike):
         if write_to_flight_path:
             self._flight_path.clear()
 
+        # boost depletion in the RLUtilities car simulation isn't reliable, keep track of it here, like the table
+        boost = car.boost
+        steps = 0
         while not test_aerial.finished:
             test_aerial.step(1 / 120)
-            test_car.boost = 100  # TODO: fix boost depletion in RLU car sim
+            if test_aerial.controls.boost:
+                boost = max(boost - BOOST_USAGE / 120, 0)
+            test_car.boost = int(boost)
             test_car.step(test_aerial.controls, 1 / 120)
 
             if write_to_flight_path:
                 self._flight_path.append(vec3(test_car.position))
 
+            steps += 1
+            if stop_on_miss and steps % self.MISS_CHECK_INTERVAL == 0 and self._certain_miss(test_car, car.time):
+                return None
+
         return test_car
 
+    def _certain_miss(self, car: Car, start_time: float) -> bool:
+        """Whether the flying car can't get within MAX_DISTANCE_ERROR of the target by the arrival time."""
+        time_left = self.aerial.arrival_time - car.time
+        if car.on_ground or car.time - start_time < self.JUMP_DURATION or time_left <= 0:
+            return False
+
+        # the last step can overshoot the arrival time
+        margin = self.MAX_DISTANCE_ERROR + self.MAX_SPEED / 120
+        target = self.aerial.target
+
+        # the car can't go faster than the speed limit
+        if distance(car, target) > self.MAX_SPEED * time_left + margin:
+            return True
+
+        # while the speed limit can't kick in, the car is within reach of accelerating from a ballistic path
+        if norm(car.velocity) + (self.MAX_AIR_ACCELERATION + 650) * time_left <= self.MAX_SPEED:
+            ballistic = car.position + car.velocity * time_left + vec3(0, 0, -325) * time_left ** 2
+            return distance(ballistic, target) > self.MAX_AIR_ACCELERATION / 2 * time_left ** 2 + margin
+
+        return False
+
     def interruptible(self) -> bool:
         return self.aerialing or super().interruptible()
 
@@ -93,7 +212,7 @@ class AerialStrike(Strike):
             super().step(dt)
 
             # simulate aerial from current state
-            simulated_car = self.simulate_flight(self.car)
+            error = self.flight_error(self.car)
 
             speed_towards_target = dot(self.car.velocity, ground_direction(self.car, self.aerial.target))
             speed_needed = ground_distance(self.car, self.aerial.target) / time_left
@@ -103,7 +222,7 @@ class AerialStrike(Strike):
                 self.controls.throttle = -1
 
             # if it ended up near the target, we could take off
-            elif distance(simulated_car, self.aerial.target) < self.MAX_DISTANCE_ERROR:
+            elif error < self.MAX_DISTANCE_ERROR:
                 if angle_to(self.car, self.aerial.target) < 0.1 or norm(self.car.velocity) < 1000:
 
                     if self.DELAY_TAKEOFF and ground_distance(self.car, self.aerial.target) > 1000:
@@ -116,11 +235,11 @@ class AerialStrike(Strike):
                         future_car.position += displacement
 
                         # simulate aerial fot the extrapolated car again
-                        future_simulated_car = self.simulate_flight(future_car, write_to_flight_path=False)
+                        future_error = self.flight_error(future_car)
 
                         # if the aerial is also successful, that means we should continue driving instead of taking off
                         # this makes sure that we go for the most late possible aerials, which are the most effective
-                        if distance(future_simulated_car, self.aerial.target) > self.MAX_DISTANCE_ERROR:
+                        if future_error > self.MAX_DISTANCE_ERROR:
                             self.aerialing = True
                         else:
                             self.too_early = True
@@ -144,3 +263,8 @@ class FastAerialStrike(AerialStrike):
     MINIMAL_HEIGHT_TIME = 1.3
     MAXIMAL_HEIGHT_TIME = 2.5
     DOUBLE_JUMP = True
+
+    intercept_predicate = (
+        HeightBand(MINIMAL_HEIGHT, MAXIMAL_HEIGHT)
+        & MinimumTime(MINIMAL_HEIGHT, MAXIMAL_HEIGHT, MINIMAL_HEIGHT_TIME, MAXIMAL_HEIGHT_TIME)
+    )
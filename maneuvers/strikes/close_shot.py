@@ -1,7 +1,7 @@
 from maneuvers.strikes.dodge_strike import DodgeStrike
-from rlutilities.simulation import Car, Ball
 from tools.intercept import Intercept
 from tools.math import abs_clamp
+from tools.predicates import HeightBand
 
 
 class CloseShot(DodgeStrike):
@@ -11,9 +11,8 @@ class CloseShot(DodgeStrike):
     """
     jump_time_multiplier = 1.1
 
-    def intercept_predicate(self, car: Car, ball: Ball):
-        # lower max height than DodgeStrike, because high jumps usually result in hitting the crossbar
-        return ball.position[2] < 250
+    # lower max height than DodgeStrike, because high jumps usually result in hitting the crossbar
+    intercept_predicate = HeightBand(high=250)
 
     def configure(self, intercept: Intercept):
         self.target[0] = abs_clamp(self.intercept.ground_pos[0], 400)
@@ -1,9 +1,15 @@
+import math
+
+import numpy as np
+
 from maneuvers.jumps.aim_dodge import AimDodge
 from maneuvers.strikes.strike import Strike
 from rlutilities.linear_algebra import norm
-from rlutilities.simulation import Car, Ball
+from rlutilities.simulation import Car
 from tools.intercept import Intercept
+from tools.jump_sim import JUMP_TABLE, MAX_HOLD_DURATION, SIMULATION_DT
 from tools.math import clamp
+from tools.predicates import HeightBand
 from tools.vector_math import ground_direction
 
 
@@ -14,9 +20,13 @@ class DodgeStrike(Strike):
 
     allow_backwards = False
     jump_time_multiplier = 1.0
+    intercept_predicate = HeightBand(high=300)
 
-    def intercept_predicate(self, car: Car, ball: Ball):
-        return ball.position[2] < 300
+    MIN_JUMP_DURATION = 0.05
+    DODGE_DELAY = 0.13  # between releasing jump and hitting the ball
+    # how much higher than the car the dodge hits the ball. Calibrated so that the jump durations stay
+    # within 0.09 seconds of the hand-tuned (z - 92) / 500 this replaced, for balls between z = 100 and 300
+    DODGE_REACH = 70
 
     def __init__(self, car, info, target=None):
         self.dodge = AimDodge(car, 0.1, info.ball.position)
@@ -34,8 +44,9 @@ class DodgeStrike(Strike):
         self.arrive.target = intercept.ground_pos - hit_dir * 100
         self.arrive.target_direction = hit_dir
 
-        additional_jump = clamp((ball.position[2]-92) / 500, 0, 1.5) * self.jump_time_multiplier
-        self.dodge.jump.duration = 0.05 + additional_jump
+        jump_duration = self.jump_duration_needed(self.car, ball.position[2])
+        additional_jump = clamp(jump_duration - self.MIN_JUMP_DURATION, 0, 1.5) * self.jump_time_multiplier
+        self.dodge.jump.duration = self.MIN_JUMP_DURATION + additional_jump
         self.dodge.target = intercept.ball.position
         self.arrive.additional_shift = additional_jump * 500
 
@@ -49,10 +60,30 @@ class DodgeStrike(Strike):
         else:
             super().step(dt)
             if (
-                self.arrive.arrival_time - self.car.time < self.dodge.jump.duration + 0.13
+                self.arrive.arrival_time - self.car.time < self.dodge.jump.duration + self.DODGE_DELAY
                 and abs(self.arrive.drive.target_speed - norm(self.car.velocity)) < 1000
             ):
                 self.dodging = True
 
         if self.dodge.finished:
             self.finished = True
+
+    @classmethod
+    def jump_duration_needed(cls, car: Car, height: float) -> float:
+        """
+        How long to hold jump before dodging, to hit the ball at a given height.
+        Jump is held until the dodge, so for short jumps the hold and the dodge time are the same.
+        """
+        rise = height - cls.DODGE_REACH - car.position[2]
+        vertical_speed, up_component = car.velocity[2], car.orientation[2, 2]
+
+        short_durations = np.arange(cls.MIN_JUMP_DURATION, MAX_HOLD_DURATION + 1e-9, SIMULATION_DT)
+        holds = JUMP_TABLE.hold_duration(rise, short_durations + cls.DODGE_DELAY, vertical_speed, up_component)
+        enough = holds <= short_durations
+        if enough.any():
+            return float(short_durations[np.argmax(enough)])
+
+        time = float(JUMP_TABLE.time_to_height(rise, vertical_speed, up_component))
+        if math.isinf(time):  # too high, dodge at the highest point
+            time = float(JUMP_TABLE.apex_time(vertical_speed, up_component))
+        return max(time - cls.DODGE_DELAY, MAX_HOLD_DURATION)
@@ -5,6 +5,8 @@ from maneuvers.strikes.strike import Strike
 from maneuvers.driving.drive import Drive
 from tools.game_info import GameInfo
 from tools.intercept import Intercept
+from tools.jump_sim import JUMP_TABLE
+from tools.predicates import HeightBand, JumpReach
 from tools.vector_math import ground_distance, ground, ground_direction, direction
 
 
@@ -15,9 +17,8 @@ ALLOWED_TIME_ERROR = 0.1
 
 
 class DoubleJumpStrike(Strike):
-
-    def intercept_predicate(self, car, ball):
-        return 250 < ball.position[2] < 550
+    # the band only pre-filters the slices, which of them the car can jump to depends on its state
+    intercept_predicate = HeightBand(250, 550) & JumpReach(double_jump=True)
 
     def __init__(self, car: Car, info: GameInfo, target=None):
         self.drive = Drive(car)
@@ -32,7 +33,7 @@ class DoubleJumpStrike(Strike):
     def configure(self, intercept: Intercept):
         super().configure(intercept)
         self.drive.target_pos = ground(intercept.position)
-        self.time_for_jump = self.double_jump_time_needed(intercept.position[2])
+        self.time_for_jump = self.double_jump_time_needed(self.car, intercept.position[2])
     
     def interruptible(self) -> bool:
         return not self.jumping and super().interruptible()
@@ -87,11 +88,7 @@ class DoubleJumpStrike(Strike):
                 self.controls = self.aerial_turn.controls
 
     @staticmethod
-    def double_jump_time_needed(height):
-        """Return the time needed for the double jump to reach a given height"""
-        # polynomial approximation
-        a = 1.872348977E-8 * height * height * height
-        b = -1.126747937E-5 * height * height
-        c = 3.560647225E-3 * height
-        d = -7.446058499E-3
-        return a + b + c + d
+    def double_jump_time_needed(car: Car, height: float) -> float:
+        """Return the time needed for the double jump to reach a given height, infinite if it can't"""
+        return float(JUMP_TABLE.time_to_height(height - car.position[2], car.velocity[2], car.orientation[2, 2],
+                                               double_jump=True))
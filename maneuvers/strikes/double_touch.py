@@ -20,7 +20,8 @@ class DoubleTouch(Maneuver):
 
     def find_second_touch(self):
         self.info.predict_ball(time_limit=3.0)
-        intercept = AirToAirIntercept(self.car, self.info.ball_predictions)
+        intercept = AirToAirIntercept(self.car, self.info.ball_predictions, time_limit=3.0,
+                                      previous_results=self.info.air_intercept_results)
         self.aerial.target = intercept.position - direction(intercept, self.aerial_strike.target) * 80
         self.aerial.up = vec3(0, 0, -1)
         self.aerial.arrival_time = intercept.time
@@ -1,8 +1,7 @@
 from maneuvers.strikes.strike import Strike
-from rlutilities.linear_algebra import dot, norm
-from rlutilities.simulation import Field, sphere, Car, Ball
 from tools.arena import Arena
 from tools.intercept import Intercept
+from tools.predicates import HeightBand, SurfaceDistance, BallSpeed
 from tools.vector_math import ground_direction
 
 
@@ -15,11 +14,13 @@ class GroundStrike(Strike):
     max_distance_from_wall = 110
     max_additional_time = 0.3
 
-    def intercept_predicate(self, car: Car, ball: Ball):
-        if ball.position[2] > 200 or abs(ball.position[1]) > Arena.size[1] - 100:
-            return False
-        contact_ray = Field.collide(sphere(ball.position, self.max_distance_from_wall))
-        return norm(contact_ray.start) > 0 and abs(dot(ball.velocity, contact_ray.direction)) < 150
+    # low balls touching the floor or a wall, not moving away from it or into it
+    intercept_predicate = (
+        HeightBand(high=200)
+        & SurfaceDistance(minimum=100, surfaces=[Arena.BACK_WALLS])
+        & SurfaceDistance(maximum=max_distance_from_wall)
+        & BallSpeed(maximum=150, normal_to=Arena.SURFACES)
+    )
 
     def configure(self, intercept: Intercept):
         target_direction = ground_direction(intercept, self.target)
@@ -1,10 +1,13 @@
 import math
 from typing import List, Optional
 
+import numpy as np
+
 from maneuvers.driving.arrive import Arrive
 from maneuvers.maneuver import Maneuver
 from rlutilities.linear_algebra import vec3, dot
 from rlutilities.simulation import Car, Ball
+from tools.ball_prediction import BallPrediction
 from tools.drawing import DrawingTool
 from tools.game_info import GameInfo
 from tools.intercept import Intercept
@@ -14,6 +17,7 @@ from tools.vector_math import ground_direction
 class Strike(Maneuver):
     allow_backwards = False
     update_interval = 0.2
+    postponed_update_interval = 0.4  # when the GameInfo asks to postpone intercept updates
     stop_updating = 0.3
     max_additional_time = 0.5
 
@@ -33,9 +37,18 @@ class Strike(Maneuver):
         self.update_intercept()
         self._initial_time = self.intercept.time
 
+    # can also be overridden with a Predicate from tools.predicates, which the intercept search evaluates faster
     def intercept_predicate(self, car: Car, ball: Ball):
         return True
 
+    @classmethod
+    def possible_slices(cls, car: Car, ball_predictions: BallPrediction) -> Optional[np.ndarray]:
+        """
+        Mask of the slices the strike could possibly intercept, if there is a quick way to tell.
+        Used to filter strike candidates before constructing them (see StrikeCandidates).
+        """
+        return None
+
     def configure(self, intercept: Intercept):
         self.arrive.target = intercept.ground_pos
         self.arrive.arrival_time = intercept.time
@@ -62,8 +75,10 @@ class Strike(Maneuver):
         return self.arrive.interruptible()
 
     def step(self, dt):
+        update_interval = self.postponed_update_interval if self.info.postpone_intercept_updates \
+            else self.update_interval
         if (
-            self._last_update_time + self.update_interval < self.car.time < self.intercept.time - self.stop_updating
+            self._last_update_time + update_interval < self.car.time < self.intercept.time - self.stop_updating
             and self.car.on_ground and not self.controls.jump
         ):
             self.info.predict_ball(time_limit=self.intercept.time - self.car.time + 1)
@@ -0,0 +1,95 @@
+import math
+from typing import Dict, List, Optional, Type, Hashable
+
+import numpy as np
+
+from maneuvers.strikes.strike import Strike
+from rlutilities.linear_algebra import vec3
+from rlutilities.simulation import Car
+from tools.game_info import GameInfo
+from tools.predicates import Predicate
+
+
+class StrikeCandidates:
+    """
+    Strikes considered during one decision of one car. They are only constructed when needed,
+    at most once per strike class and target, so that the decision can ask for the same strike twice.
+
+    Before constructing a strike, a cheap lower bound on its intercept time is computed: the first slice
+    its predicate accepts, that the car could reach by driving straight at it with max speed.
+    Candidates are then constructed in the order of their bounds, until none of the others can be faster.
+    """
+
+    MAX_CAR_SPEED = 2300
+
+    # the intercept time estimate isn't strictly slower than driving at max speed, allow for that
+    BOUND_SLACK = 0.1
+
+    def __init__(self, car: Car, info: GameInfo):
+        self.car = car
+        self.info = info
+        self._strikes: Dict[Hashable, Strike] = {}
+        self._bounds: Dict[type, float] = {}
+        self._reachable: Optional[np.ndarray] = None
+
+    def get(self, strike_class: Type[Strike], target: vec3 = None) -> Strike:
+        key = strike_class, None if target is None else (target[0], target[1], target[2])
+        if key not in self._strikes:
+            self._strikes[key] = strike_class(self.car, self.info, target)
+        return self._strikes[key]
+
+    def lower_bound(self, strike_class: Type[Strike]) -> float:
+        """
+        Time of the earliest slice the strike could possibly intercept.
+        Intercepts that aren't viable use the last slice, so the bound is never later than that.
+        """
+        if strike_class not in self._bounds:
+            ball_predictions = self.info.ball_predictions
+            n = len(ball_predictions)
+            possible = self._optimistically_reachable()
+            predicate = strike_class.intercept_predicate
+            if isinstance(predicate, Predicate):
+                possible = possible & predicate.mask(self.car, ball_predictions)
+            strike_possible = strike_class.possible_slices(self.car, ball_predictions)
+            if strike_possible is not None:
+                possible = possible & strike_possible
+
+            indices = np.flatnonzero(possible)
+            bound = ball_predictions.time[indices[0]] if len(indices) else math.inf
+            self._bounds[strike_class] = min(bound, ball_predictions.time[n - 1]) if n else math.inf
+        return self._bounds[strike_class]
+
+    def fastest(self, strike_classes: List[Type[Strike]], target: vec3 = None,
+                faster_than: float = math.inf) -> Optional[Strike]:
+        """
+        The strike with the earliest intercept, like min() over all of them, ties going to the one listed first.
+        Only strikes faster than `faster_than` count, None is returned if there isn't any.
+        """
+        order = sorted(range(len(strike_classes)), key=lambda i: (self.lower_bound(strike_classes[i]), i))
+
+        best: Optional[Strike] = None
+        best_index = -1
+        for i in order:
+            bound = self.lower_bound(strike_classes[i])
+            best_time = faster_than if best is None else best.intercept.time
+            if bound > best_time or (bound == best_time and (best is None or i > best_index)):
+                break
+
+            strike = self.get(strike_classes[i], target)
+            if strike.intercept.time < best_time or (strike.intercept.time == best_time and i < best_index):
+                best, best_index = strike, i
+
+        if best is not None and best.intercept.time < faster_than:
+            return best
+        return None
+
+    def _optimistically_reachable(self) -> np.ndarray:
+        if self._reachable is None:
+            ball_predictions = self.info.ball_predictions
+            n = len(ball_predictions)
+            position = self.car.position
+            offsets = ball_predictions.position[:n] - (position[0], position[1], position[2])
+            distances = np.linalg.norm(offsets, axis=1)
+            time_left = ball_predictions.time[:n] - self.car.time
+            self._reachable = time_left > distances / self.MAX_CAR_SPEED - self.BOUND_SLACK
+        return self._reachable
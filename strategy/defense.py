@@ -1,6 +1,7 @@
 from maneuvers.strikes.clears import DodgeClear, AerialClear, DoubleJumpClear, FastAerialClear
 from maneuvers.strikes.strike import Strike
 from rlutilities.simulation import Car
+from strategy.candidates import StrikeCandidates
 from tools.game_info import GameInfo
 
 
@@ -9,12 +10,13 @@ class Defense:
     def __init__(self, info: GameInfo):
         self.info = info
 
-    def any_clear(self, car: Car) -> Strike:
+    def any_clear(self, car: Car, candidates: StrikeCandidates = None) -> Strike:
+        candidates = candidates or StrikeCandidates(car, self.info)
         clears = [
-            DodgeClear(car, self.info),
-            # DoubleJumpClear(car, self.info)
+            DodgeClear,
+            # DoubleJumpClear
         ]
         if car.boost > 40:  # TODO
-            clears.append(AerialClear(car, self.info))
-            clears.append(FastAerialClear(car, self.info))
-        return min(clears, key=lambda clear: clear.intercept.time)
+            clears.append(AerialClear)
+            clears.append(FastAerialClear)
+        return candidates.fastest(clears) or candidates.get(DodgeClear)
@@ -1,5 +1,9 @@
-from typing import List, Optional, Dict
+import math
+from typing import List, Optional, Dict, Tuple
 
+import numpy as np
+
+from maneuvers.driving.hold import Hold
 from maneuvers.recovery import Recovery
 from maneuvers.kickoffs.drive_backwards_to_goal import DriveBackwardsToGoal
 from maneuvers.kickoffs.half_flip_pickup import HalfFlipPickup
@@ -13,11 +17,37 @@ from strategy.offense import Offense
 from tools.drawing import DrawingTool
 from tools.drone import Drone
 from tools.game_info import GameInfo
-from tools.intercept import Intercept
+from tools.assignment import solve_assignment
+from tools.intercept import Intercept, batch_intercepts, estimate_times
 from tools.vector_math import align, ground, ground_distance, distance
 
 
 class HivemindStrategy:
+    STRIKER = "striker"
+    REFUEL = "refuel"
+    FAR_DEFENDER = "far defender"
+    SHADOW = "shadow"
+    KEEP = "keep"
+
+    # Role costs are in seconds, roughly the time a drone needs to take the role, minus the role's priority.
+    # The priorities are far larger than any travel time, so they decide which roles are filled:
+    # the striker always is, then every drone that needs boost refuels, then the far defender,
+    # and travel times only decide between drones and pads within that order.
+    # The striker's time to the ball is weighted so that the drone at the ball first strikes, unless another one
+    # is less than about REFUEL_PRIORITY / STRIKER_TIME_WEIGHT seconds later, then the other roles decide.
+    # Candidates without an aligned intercept are only picked if nobody has one, the nearest to our goal first.
+    STRIKER_PRIORITY = 10000.0
+    STRIKER_TIME_WEIGHT = 100.0
+    MISALIGNED_DELAY = 10.0
+    REFUEL_PRIORITY = 20.0
+    FAR_DEFENDER_PRIORITY = 10.0
+    INFEASIBLE = 1e6
+    SPEED = 2300.0
+
+    REFUEL_BOOST = 30
+    FAR_DEFENDER_DISTANCE = 7000
+    SHADOW_DISTANCE = 4000
+
     def __init__(self, info: GameInfo, logger):
         self.info: GameInfo = info
         self.logger = logger
@@ -30,12 +60,26 @@ class HivemindStrategy:
 
         self.boost_reservations: Dict[Drone, Pad] = {}
 
+        self._collisions: Optional[List[Tuple[int, int, float]]] = None
+
+        # how many drones start their maneuver in one tick, at least 1, None starts all of them at once.
+        # The others hold their course until `start_pending_maneuvers` gets to them in the following ticks,
+        # so creating the maneuvers is spread over consecutive ticks, without assigning the roles again.
+        self.max_planned_per_tick: Optional[int] = None
+        self._pending_roles: List[Tuple[Drone, str, object]] = []
+
+        # when a striker has to be picked, the ball is predicted in one tick,
+        # and the intercepts, the assignment and the striker's maneuver follow in the next one
+        self._assign_next_tick = False
+
     def set_kickoff_maneuvers(self, drones: List[Drone]):
         nearest_drone = min(drones, key=lambda drone: ground_distance(drone.car, self.info.ball))
         nearest_drone.maneuver = KickoffStrategy.choose_kickoff(self.info, nearest_drone.car)
         self.drone_going_for_ball = nearest_drone
 
         self.boost_reservations.clear()
+        self._pending_roles = []
+        self._assign_next_tick = False
         corner_drones = [drone for drone in drones if abs(drone.car.position[0]) > 2000]
         if len(corner_drones) > 1:
             other_corner_drone = next(drone for drone in corner_drones if drone is not nearest_drone)
@@ -52,10 +96,27 @@ class HivemindStrategy:
                 drone.maneuver = Refuel(drone.car, self.info, self.info.my_goal.center, forbidden_pads=reserved_pads)
                 self.boost_reservations[drone] = drone.maneuver.pad
 
+    def needs_planning(self, drones: List[Drone]) -> bool:
+        return self._assign_next_tick or any(drone.maneuver is None for drone in drones)
+
+    def needs_prediction(self, drones: List[Drone]) -> bool:
+        """Whether `set_maneuvers` picks a striker, which needs the ball prediction."""
+        return bool(self._striker_candidates(drones))
+
+    def _striker_candidates(self, drones: List[Drone]) -> List[Drone]:
+        """If nobody is committed to the ball, drones with an interruptible maneuver can be picked for it."""
+        if self.drone_going_for_ball is not None and self.drone_going_for_ball.maneuver is not None:
+            return []
+        return [drone for drone in drones if not drone.car.demolished
+                and (drone.maneuver is None or drone.maneuver.interruptible())
+                and drone.car.position[2] < 300]
+
     def set_maneuvers(self, drones: List[Drone]):
+        """
+        Assign roles to the waiting drones, see `assign_roles`. If a striker has to be picked, the waiting drones
+        only hold their course in the first tick, while the ball is predicted, and get their roles in the next one.
+        """
         info = self.info
-        their_goal = ground(info.their_goal.center)
-        our_goal = ground(info.my_goal.center)
 
         if self.drone_going_for_ball is not None and self.drone_going_for_ball.maneuver is None:
             self.drone_going_for_ball = None
@@ -68,66 +129,186 @@ class HivemindStrategy:
             if drone.maneuver is None and not drone.car.on_ground:
                 drone.maneuver = Recovery(drone.car)
 
-        # decide which drone is gonna commit
-        if self.drone_going_for_ball is None:
-            ready_drones = [drone for drone in drones if not drone.car.demolished
-                            and (drone.maneuver is None or drone.maneuver.interruptible())
-                            and drone.car.position[2] < 300]
-            if not ready_drones:
-                return
+        # clear expired boost reservations
+        for drone in drones:
+            if not isinstance(drone.maneuver, Refuel) and drone in self.boost_reservations:
+                del self.boost_reservations[drone]
+
+        # waiting drones get a role, and if nobody is committed to the ball yet,
+        # drones with an interruptible maneuver can be picked for it too
+        free_drones = [drone for drone in drones if drone.maneuver is None or isinstance(drone.maneuver, Hold)]
+        striker_candidates = self._striker_candidates(drones)
+        busy_drones = [drone for drone in striker_candidates if drone not in free_drones]
+        self._pending_roles = []
+        if not free_drones and not busy_drones:
+            self._assign_next_tick = False
+            return
+
+        if striker_candidates and not self._assign_next_tick:
+            self._assign_next_tick = True
+            for drone in free_drones:
+                if drone.maneuver is None:
+                    drone.maneuver = Hold(drone.car, info.my_goal.center)
+            return
+        self._assign_next_tick = False
 
+        # predicted in the prediction phase already, see `needs_prediction`
+        if striker_candidates:
             info.predict_ball()
-            our_intercepts = [Intercept(drone.car, info.ball_predictions) for drone in ready_drones]
-            good_intercepts = [i for i in our_intercepts if align(i.car.position, i.ball, their_goal) > 0.3]
+        roles = self.assign_roles(free_drones, busy_drones, striker_candidates)
 
-            if good_intercepts:
-                best_intercept = min(good_intercepts, key=lambda intercept: intercept.time)
-            else:
-                best_intercept = min(our_intercepts, key=lambda i: ground_distance(i.car, our_goal))
+        # the striker goes first, the drones that have to wait for their turn hold their course
+        self._pending_roles = [(drone, role, target) for drone, (role, target) in zip(free_drones + busy_drones, roles)
+                               if role != self.KEEP]
+        self._pending_roles.sort(key=lambda pending: pending[1] != self.STRIKER)
+        for drone, _, _ in self._pending_roles:
+            if drone.maneuver is None:
+                drone.maneuver = Hold(drone.car, info.my_goal.center)
+        self.start_pending_maneuvers()
 
-            # find out which drone does the intercept belong to
-            self.drone_going_for_ball = next(drone for drone in ready_drones if drone.car == best_intercept.car)
+    def has_pending_maneuvers(self) -> bool:
+        return bool(self._pending_roles)
 
-            # if not completely out of position, go for a shot
-            if (
-                align(best_intercept.car.position, best_intercept.ball, their_goal) > 0
-                or ground_distance(best_intercept, our_goal) > 6000
-            ):
-                strike = self.offense.any_shot(best_intercept.car, their_goal, best_intercept)
+    def start_pending_maneuvers(self):
+        """
+        Start the maneuvers of up to max_planned_per_tick drones, for the roles assigned in the last `set_maneuvers`.
+        Drones whose Hold has been replaced in the meantime, e.g. by a kickoff or a recovery, are skipped.
+        """
+        assert self.max_planned_per_tick is None or self.max_planned_per_tick >= 1, \
+            "max_planned_per_tick must start at least one maneuver per tick, or None for all of them"
+        info = self.info
+        their_goal = ground(info.their_goal.center)
+        our_goal = ground(info.my_goal.center)
 
-            else:  # otherwise try to clear
-                strike = self.defense.any_clear(best_intercept.car)
+        starting = self._pending_roles[:self.max_planned_per_tick]
+        self._pending_roles = self._pending_roles[len(starting):]
 
-            self.drone_going_for_ball.maneuver = strike
+        for drone, role, target in starting:
+            if role != self.STRIKER and not isinstance(drone.maneuver, Hold):
+                continue
 
-            if self.drone_going_for_ball is self.defending_drone:
-                self.defending_drone = None
+            if role == self.STRIKER:
+                intercept = target
+                self.drone_going_for_ball = drone
+                self.boost_reservations.pop(drone, None)
 
-        # clear expired boost reservations
-        for drone in drones:
-            if not isinstance(drone.maneuver, Refuel) and drone in self.boost_reservations:
-                del self.boost_reservations[drone]
+                # if not completely out of position, go for a shot
+                if (
+                    align(intercept.car.position, intercept.ball, their_goal) > 0
+                    or ground_distance(intercept, our_goal) > 6000
+                ):
+                    drone.maneuver = self.offense.any_shot(drone.car, their_goal, intercept)
 
-        # drones that need boost go for boost
-        for drone in drones:
-            if drone.maneuver is None:
-                if drone.car.boost < 30:
-                    reserved_pads = {self.boost_reservations[drone] for drone in self.boost_reservations}
-                    drone.maneuver = Refuel(drone.car, info, info.ball.position, forbidden_pads=reserved_pads)
-                    self.boost_reservations[drone] = drone.maneuver.pad  # reserve chosen boost pad
-
-        # pick one drone that will stay far back
-        unemployed_drones = [drone for drone in drones if drone.maneuver is None]
-        if unemployed_drones and self.defending_drone is None:
-            self.defending_drone = min(unemployed_drones, key=lambda d: ground_distance(d.car, info.my_goal.center))
-            self.defending_drone.maneuver = GeneralDefense(self.defending_drone.car, info, info.ball.position, 7000)
-            unemployed_drones.remove(self.defending_drone)
-
-        for drone in unemployed_drones:
-            drone.maneuver = GeneralDefense(drone.car, info, info.ball.position, 4000)
-
-    def avoid_demos_and_team_bumps(self, drones: List[Drone]):
-        collisions = self.info.detect_collisions(time_limit=0.2, dt=1 / 60)
+                else:  # otherwise try to clear
+                    drone.maneuver = self.defense.any_clear(drone.car)
+
+                if drone is self.defending_drone:
+                    self.defending_drone = None
+
+            elif role == self.REFUEL:
+                drone.maneuver = Refuel(drone.car, info, info.ball.position, pad=target)
+                self.boost_reservations[drone] = target  # reserve chosen boost pad
+
+            elif role == self.FAR_DEFENDER:
+                self.defending_drone = drone
+                drone.maneuver = GeneralDefense(drone.car, info, info.ball.position, self.FAR_DEFENDER_DISTANCE)
+
+            elif role == self.SHADOW:
+                drone.maneuver = GeneralDefense(drone.car, info, info.ball.position, self.SHADOW_DISTANCE)
+
+    def assign_roles(self, free_drones: List[Drone], busy_drones: List[Drone],
+                     striker_candidates: List[Drone]) -> List[Tuple[str, object]]:
+        """
+        Give each drone a role, so that the total cost of all drones is minimal.
+        The cost matrix has a row for each free drone and then each busy drone, and a column for each role:
+        the striker, the far defender, every large boost pad that isn't reserved, a shadow position
+        for every free drone, and for every busy drone, keeping its current maneuver.
+        Costs are roughly the time to take the role, minus the role's priority.
+        Striker candidates cost the weighted time to their intercept if it's aligned with their goal,
+        otherwise the time to our goal after MISALIGNED_DELAY, like the earliest aligned intercept was preferred
+        before, but near ties are broken by the roles the other drones get.
+        Returns (role, target) for each row, where the target is the striker's Intercept or the pad to refuel at.
+        """
+        info = self.info
+        drones = free_drones + busy_drones
+        cars = [drone.car for drone in drones]
+        n_free, n_busy = len(free_drones), len(busy_drones)
+
+        positions = np.array([[car.position[0], car.position[1], car.position[2]] for car in cars])
+        is_free = np.arange(len(drones)) < n_free
+        our_goal = np.array([info.my_goal.center[0], info.my_goal.center[1], info.my_goal.center[2]])
+        their_goal = ground(info.their_goal.center)
+        ball = np.array([info.ball.position[0], info.ball.position[1], info.ball.position[2]])
+        goal_distances = np.linalg.norm((positions - our_goal)[:, :2], axis=1)
+
+        columns: List[Tuple[str, object]] = []
+        column_costs: List[np.ndarray] = []
+
+        # striker, preferring the earliest aligned intercept, otherwise the candidate nearest to our goal
+        intercepts: Dict[int, Intercept] = {}
+        if striker_candidates:
+            candidate_rows = [drones.index(drone) for drone in striker_candidates]
+            candidate_cars = [drone.car for drone in striker_candidates]
+            intercepts = dict(zip(candidate_rows, batch_intercepts(candidate_cars, info.ball_predictions)))
+
+            cost = np.full(len(drones), self.INFEASIBLE)
+            for row, intercept in intercepts.items():
+                if math.isfinite(intercept.time) and align(intercept.car.position, intercept.ball, their_goal) > 0.3:
+                    time = intercept.time - intercept.car.time
+                else:
+                    time = self.MISALIGNED_DELAY + goal_distances[row] / self.SPEED
+                cost[row] = time * self.STRIKER_TIME_WEIGHT - self.STRIKER_PRIORITY
+            columns.append((self.STRIKER, None))
+            column_costs.append(cost)
+
+        # far defender
+        if self.defending_drone is None:
+            columns.append((self.FAR_DEFENDER, None))
+            column_costs.append(np.where(is_free, goal_distances / self.SPEED - self.FAR_DEFENDER_PRIORITY,
+                                         self.INFEASIBLE))
+
+        # every large boost pad not reserved by a drone that's already refueling, for drones that need boost,
+        # preferring pads near a point between the drone, our goal and the ball, like Refuel.pickup_position
+        reserved = {(pad.position[0], pad.position[1]) for pad in self.boost_reservations.values()}
+        pads = [pad for pad in info.large_boost_pads if (pad.position[0], pad.position[1]) not in reserved]
+        if pads:
+            pad_positions = np.array([[pad.position[0], pad.position[1], pad.position[2]] for pad in pads])
+            pickup_positions = (ball + positions * 2 + our_goal * 2) / 5
+            pickup_distances = np.linalg.norm(pickup_positions[:, np.newaxis] - pad_positions, axis=2)
+            arrivals = estimate_times(cars, pad_positions)
+            timers = np.array([pad.timer for pad in pads])
+            available = np.array([pad.is_active for pad in pads]) | (timers < arrivals)
+            needs_boost = is_free & (np.array([car.boost for car in cars]) < self.REFUEL_BOOST)
+            pad_costs = np.where(available & needs_boost[:, np.newaxis],
+                                 pickup_distances / self.SPEED - self.REFUEL_PRIORITY, self.INFEASIBLE)
+            columns += [(self.REFUEL, pad) for pad in pads]
+            column_costs += list(pad_costs.T)
+
+        # shadow positions in front of our goal, one per free drone
+        to_goal = (our_goal - ball)[:2]
+        shadow = ball[:2] + to_goal / max(np.linalg.norm(to_goal), 1) * self.SHADOW_DISTANCE
+        shadow_costs = np.where(is_free, np.linalg.norm(positions[:, :2] - shadow, axis=1) / self.SPEED,
+                                self.INFEASIBLE)
+        columns += [(self.SHADOW, None)] * n_free
+        column_costs += [shadow_costs] * n_free
+
+        # busy drones can keep their maneuver
+        for i in range(n_busy):
+            cost = np.full(len(drones), self.INFEASIBLE)
+            cost[n_free + i] = 0.0
+            columns.append((self.KEEP, None))
+            column_costs.append(cost)
+
+        costs = np.array(column_costs).T
+        roles = [columns[column] for column in solve_assignment(costs)]
+        return [(role, intercepts[row]) if role == self.STRIKER else (role, target)
+                for row, (role, target) in enumerate(roles)]
+
+    def avoid_demos_and_team_bumps(self, drones: List[Drone], reuse_collisions=False):
+        """With `reuse_collisions`, the collisions detected in the previous call are used again, to save time."""
+        if not reuse_collisions or self._collisions is None:
+            self._collisions = self.info.detect_collisions(time_limit=0.2, dt=1 / 60)
+        collisions = self._collisions
         drones_by_index: Dict[int, Drone] = {drone.index: drone for drone in drones}
 
         for collision in collisions:
@@ -8,6 +8,7 @@ from maneuvers.strikes.ground_strike import GroundStrike
 from maneuvers.strikes.mirror_strike import MirrorStrike
 from rlutilities.linear_algebra import vec3
 from rlutilities.simulation import Car
+from strategy.candidates import StrikeCandidates
 from tools.game_info import GameInfo
 from tools.intercept import Intercept
 from tools.vector_math import distance, ground_distance, align
@@ -19,35 +20,35 @@ class Offense:
         self.info = info
         self.allow_dribbles = False
 
-    def direct_shot(self, car: Car, target: vec3) -> Maneuver:
-        dodge_shot = DodgeStrike(car, self.info, target)
-        ground_shot = GroundStrike(car, self.info, target)
+    def direct_shot(self, car: Car, target: vec3, candidates: StrikeCandidates = None) -> Maneuver:
+        # strikes are only constructed when they can make a difference
+        candidates = candidates or StrikeCandidates(car, self.info)
+        dodge_shot = candidates.get(DodgeStrike, target)
 
         if car.boost > 40:  # TODO
-            aerial_strike = AerialStrike(car, self.info, target)
-            fast_aerial = FastAerialStrike(car, self.info, target)
+            better_aerial_strike = candidates.fastest([AerialStrike, FastAerialStrike], target,
+                                                      faster_than=dodge_shot.intercept.time)
 
-            better_aerial_strike = min([aerial_strike, fast_aerial], key=lambda strike: strike.intercept.time)
-
-            if better_aerial_strike.intercept.time < dodge_shot.intercept.time:
+            if better_aerial_strike is not None:
                 if ground_distance(better_aerial_strike.intercept, self.info.their_goal.center) < 5000:
                     return DoubleTouch(better_aerial_strike)
                 return better_aerial_strike
 
         if (
-            dodge_shot.intercept.time < ground_shot.intercept.time - 0.1
+            dodge_shot.intercept.time < candidates.lower_bound(GroundStrike) - 0.1
             or ground_distance(dodge_shot.intercept, target) < 4000
-            or distance(ground_shot.intercept.ball.velocity, car.velocity) < 500
+            or dodge_shot.intercept.time < candidates.get(GroundStrike, target).intercept.time - 0.1
+            or distance(candidates.get(GroundStrike, target).intercept.ball.velocity, car.velocity) < 500
         ):
             if (
                 distance(dodge_shot.intercept.ground_pos, target) < 4000
                 and abs(dodge_shot.intercept.ground_pos[0]) < 3000
             ):
-                return CloseShot(car, self.info, target)
+                return candidates.get(CloseShot, target)
             return dodge_shot
-        return ground_shot
+        return candidates.get(GroundStrike, target)
 
-    def any_shot(self, car: Car, target: vec3, intercept: Intercept) -> Maneuver:
+    def any_shot(self, car: Car, target: vec3, intercept: Intercept, candidates: StrikeCandidates = None) -> Maneuver:
         ball = intercept.ball
 
         if (
@@ -67,7 +68,7 @@ class Offense:
         # if 250 < ball.position[2] < 550 and self.is_opponent_close(car, ball):
         #     return DoubleJumpStrike(car, self.info, target)
 
-        return self.direct_shot(car, target)
+        return self.direct_shot(car, target, candidates)
 
     def is_opponent_close(self, car, ball) -> bool:
         for opponent in self.info.get_opponents(car):
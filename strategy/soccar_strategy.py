@@ -6,12 +6,13 @@ from maneuvers.refuel import Refuel
 from maneuvers.general_defense import GeneralDefense
 from maneuvers.strikes.strike import Strike
 from rlutilities.simulation import Car
+from strategy.candidates import StrikeCandidates
 from strategy.defense import Defense
 from strategy.kickoffs import KickoffStrategy
 from strategy.offense import Offense
 from tools.arena import Arena
 from tools.game_info import GameInfo
-from tools.intercept import Intercept, estimate_time
+from tools.intercept import Intercept, estimate_time, batch_intercepts
 from tools.vector_math import align, ground, ground_distance, distance
 
 
@@ -25,7 +26,7 @@ class SoccarStrategy:
     def best_intercept(self, cars: List[Car]) -> Intercept:
         if not cars:
             return Intercept(Car(), self.info.ball_predictions)
-        intercepts = [Intercept(car, self.info.ball_predictions) for car in cars]
+        intercepts = batch_intercepts(cars, self.info.ball_predictions)
         return min(intercepts, key=lambda intercept: intercept.time)
 
     def choose_maneuver(self, car: Car):
@@ -43,6 +44,9 @@ class SoccarStrategy:
         their_best_hit = self.best_intercept(opponents)
         opponent = their_best_hit.car
 
+        # strikes built for this decision, shared between the branches below
+        candidates = StrikeCandidates(car, info)
+
         # recovery
         if not car.on_ground:
             return Recovery(car)
@@ -62,9 +66,9 @@ class SoccarStrategy:
 
             if align(car.position, my_hit.ball, their_goal) > 0.0:
 
-                return offense.direct_shot(car, their_goal)
+                return offense.direct_shot(car, their_goal, candidates)
 
-            return self.defense.any_clear(car)
+            return self.defense.any_clear(car, candidates)
 
         # fallback
         if align(car.position, my_hit.ball, my_goal) > 0.2:
@@ -72,7 +76,7 @@ class SoccarStrategy:
                 ground_distance(my_hit, my_goal) < 4000
                 and abs(car.position[1]) < abs(my_hit.position[1])
             ):
-                return self.defense.any_clear(car)
+                return self.defense.any_clear(car, candidates)
             return GeneralDefense(car, info, my_hit.ground_pos, 6000)
 
         # clear
@@ -82,8 +86,8 @@ class SoccarStrategy:
             and ground_distance(car, my_goal) < 2500
         ):
             if align(car.position, my_hit.ball, their_goal) > 0:
-                return offense.direct_shot(car, their_goal)
-            return self.defense.any_clear(car)
+                return offense.direct_shot(car, their_goal, candidates)
+            return self.defense.any_clear(car, candidates)
 
         if distance(their_best_hit, their_goal) < distance(their_best_hit, my_goal):
             opponents_align = -align(opponent.position, their_best_hit.ball, their_goal)
@@ -95,7 +99,7 @@ class SoccarStrategy:
 
             # I can get to ball faster than them
             if my_hit.time < their_best_hit.time - 0.8:
-                strike = offense.any_shot(car, their_goal, my_hit)
+                strike = offense.any_shot(car, their_goal, my_hit, candidates)
 
                 if not isinstance(strike, Strike):
                     return strike
@@ -121,7 +125,7 @@ class SoccarStrategy:
                 and my_hit.time < their_best_hit.time - opponents_align * 1.5
             ):
 
-                strike = offense.any_shot(car, their_goal, my_hit)
+                strike = offense.any_shot(car, their_goal, my_hit, candidates)
 
                 if not isinstance(strike, Strike) or strike.intercept.is_viable \
                 and (not info.about_to_score or strike.intercept.time < info.time_of_goal - 0.5):
@@ -146,14 +150,14 @@ class SoccarStrategy:
                     return refuel
 
             if opponents_align < 0:
-                return offense.any_shot(car, their_goal, my_hit)
+                return offense.any_shot(car, their_goal, my_hit, candidates)
 
         # teamplay
         else:
             if car.boost < 40:
                 return Refuel(car, info, my_goal)
             else:
-                return offense.any_shot(car, their_goal, my_hit)
+                return offense.any_shot(car, their_goal, my_hit, candidates)
 
         shadow_distance = 4000 + opponents_align * 1500
         shadow_distance = max(shadow_distance, 3000)
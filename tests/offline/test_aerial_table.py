@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("rlutilities.simulation", exc_type=ImportError)
+
+from tools.aerial_table import AerialTable  # noqa: E402
+
+
+def test_load_rejects_a_table_with_other_axes(tmp_path):
+    path = str(tmp_path / "aerial_table.npy")
+    np.save(path, np.zeros((2, 3), dtype=np.float16))
+    with pytest.warns(UserWarning):
+        assert AerialTable.load(path) is None
+
+    np.save(path, np.zeros(AerialTable.SHAPE, dtype=np.float16))
+    assert AerialTable.load(path) is not None
@@ -0,0 +1,37 @@
+import math
+
+import pytest
+
+pytest.importorskip("rlutilities.simulation", exc_type=ImportError)
+
+from rlutilities.linear_algebra import vec3  # noqa: E402
+from tools.arena import Arena  # noqa: E402
+
+RADIUS = 50
+
+
+def test_falling_car_lands_on_the_floor():
+    contacts = Arena.ballistic_contacts(vec3(0, 0, 500), vec3(0, 0, 0), RADIUS, 0, 2)
+    time, position, normal = contacts[0]
+    assert math.isclose(time, math.sqrt((500 - RADIUS) / 325))
+    assert abs(position[2] - RADIUS) < 1e-6
+    assert (normal[0], normal[1], normal[2]) == (0, 0, 1)
+
+
+def test_contacts_are_ordered_by_time():
+    contacts = Arena.ballistic_contacts(vec3(0, 4000, 1000), vec3(0, 2000, 0), RADIUS, 0, 2)
+    times = [contact[0] for contact in contacts]
+    assert times == sorted(times)
+    assert contacts[0][2][1] == -1  # the back wall comes before the floor
+    assert math.isclose(contacts[0][0], (Arena.size[1] - 4000 - RADIUS) / 2000)
+
+
+def test_car_inside_a_goal_skips_the_back_wall():
+    contacts = Arena.ballistic_contacts(vec3(0, 5400, 300), vec3(0, 100, 0), RADIUS, 0, 2)
+    assert contacts
+    assert all(normal[1] != -1 for _, _, normal in contacts)
+    assert contacts[0][2][2] == 1
+
+
+def test_no_contact_in_the_window():
+    assert Arena.ballistic_contacts(vec3(0, 0, 1000), vec3(0, 0, 0), RADIUS, 0, 0.5) == []
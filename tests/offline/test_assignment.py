@@ -0,0 +1,37 @@
+from itertools import permutations
+
+import numpy as np
+
+from tools.assignment import hungarian, solve_assignment
+
+
+def brute_force_cost(costs: np.ndarray) -> float:
+    n, m = costs.shape
+    return min(costs[np.arange(n), list(columns)].sum() for columns in permutations(range(m), n))
+
+
+def test_hungarian_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n = int(rng.integers(1, 6))
+        m = int(rng.integers(n, 7))
+        costs = rng.normal(size=(n, m)) * 10
+        columns = hungarian(costs)
+        assert len(set(columns)) == n
+        assert np.isclose(costs[np.arange(n), columns].sum(), brute_force_cost(costs))
+
+
+def test_hungarian_with_ties_and_infeasible_entries():
+    rng = np.random.default_rng(1)
+    for _ in range(300):
+        n = int(rng.integers(1, 5))
+        m = int(rng.integers(n, 6))
+        costs = rng.integers(-2, 3, size=(n, m)).astype(float)
+        costs[rng.random((n, m)) < 0.3] = 1e6
+        columns = hungarian(costs)
+        assert len(set(columns)) == n
+        assert np.isclose(costs[np.arange(n), columns].sum(), brute_force_cost(costs))
+
+
+def test_solve_assignment_without_rows():
+    assert len(solve_assignment(np.zeros((0, 3)))) == 0
@@ -0,0 +1,73 @@
+import numpy as np
+
+from tools.jump_sim import (JUMP_TABLE, JUMP_IMPULSE, HOLD_ACCELERATION, GRAVITY, MAX_HOLD_DURATION,
+                            SECOND_JUMP_DELAY, SIMULATION_DT, simulate_heights, time_to_height)
+
+
+def reference_heights(hold, second_jump_time, vertical_speed, up_component, steps, dt=SIMULATION_DT):
+    """The vertical part of the JumpSim loop that simulate_heights replaced, one tick at a time."""
+    height, velocity, timer, jumped_twice = 0.0, vertical_speed, 0.0, False
+    heights = [height]
+    for _ in range(steps):
+        if timer == 0.0:
+            velocity += up_component * JUMP_IMPULSE
+        elif timer <= hold:
+            velocity += up_component * HOLD_ACCELERATION * dt
+        elif not jumped_twice and timer >= second_jump_time:
+            velocity += up_component * JUMP_IMPULSE
+            jumped_twice = True
+
+        velocity += GRAVITY * dt
+        height += velocity * dt
+        heights.append(height)
+        timer += dt
+    return np.array(heights)
+
+
+def test_simulate_heights_matches_the_tick_by_tick_loop():
+    steps = 240
+    # holds and second jumps between ticks, so accumulating the timer in the loop can't round across them
+    for hold in (0.5 * SIMULATION_DT, 0.1 + 0.5 * SIMULATION_DT, MAX_HOLD_DURATION - 0.5 * SIMULATION_DT):
+        for second_jump_time in (np.inf, hold + 2.25 * SIMULATION_DT, 0.6 + 0.5 * SIMULATION_DT):
+            for vertical_speed in (-250.0, 0.0, 500.0):
+                for up_component in (0.7, 1.0):
+                    expected = reference_heights(hold, second_jump_time, vertical_speed, up_component, steps)
+                    heights = simulate_heights(hold, second_jump_time, vertical_speed, up_component,
+                                               duration=steps * SIMULATION_DT)
+                    assert np.allclose(heights, expected, atol=1e-6)
+
+
+def test_simulate_heights_broadcasts():
+    heights = simulate_heights(np.array([0.1, 0.2])[:, None], np.inf, np.array([0.0, 250.0, 500.0]), 1.0)
+    assert heights.shape[:2] == (2, 3)
+    assert np.allclose(heights[1, 2], simulate_heights(0.2, np.inf, 500.0, 1.0))
+
+
+def test_time_to_height_is_infinite_above_the_highest_point():
+    heights = simulate_heights(MAX_HOLD_DURATION, np.inf, 0.0, 1.0)
+    highest = heights.max()
+    times = time_to_height(heights, np.array([highest / 2, highest - 1, highest + 1]))
+    assert np.isfinite(times[:2]).all() and np.isinf(times[2])
+    assert np.interp(times[0], np.arange(len(heights)) * SIMULATION_DT, heights) >= highest / 2 - 1e-6
+
+    assert np.isinf(JUMP_TABLE.time_to_height(highest + 5))
+    assert np.isinf(JUMP_TABLE.time_to_height(600, double_jump=True))
+
+
+def test_jump_table_times_reach_the_heights():
+    single = simulate_heights(MAX_HOLD_DURATION, np.inf, 0.0, 1.0)
+    double = simulate_heights(MAX_HOLD_DURATION, MAX_HOLD_DURATION + SECOND_JUMP_DELAY, 0.0, 1.0)
+    times = np.arange(len(single)) * SIMULATION_DT
+    for heights, double_jump, targets in ((single, False, (50, 120, 200)), (double, True, (150, 300, 450))):
+        for target in targets:
+            time = float(JUMP_TABLE.time_to_height(target, double_jump=double_jump))
+            assert abs(np.interp(time, times, heights) - target) < 5
+
+
+def test_hold_durations_reach_the_heights_in_time():
+    for target, time in ((60, 0.3), (100, 0.4), (150, 0.5)):
+        hold = float(JUMP_TABLE.hold_duration(target, time))
+        assert hold <= MAX_HOLD_DURATION
+        tick = int(round(time / SIMULATION_DT))
+        assert simulate_heights(hold + SIMULATION_DT, np.inf, 0.0, 1.0)[tick] >= target - 1
+        assert JUMP_TABLE.hold_duration(400, 0.3) > MAX_HOLD_DURATION
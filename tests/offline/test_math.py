@@ -0,0 +1,49 @@
+import math
+
+import numpy as np
+
+from tools.math import first_root, interpolate
+
+
+def test_first_root_of_linear_polynomial():
+    assert math.isclose(first_root(10, -2, 0, 0, 10), 5)
+    assert first_root(10, 2, 0, 0, 10) is None
+    assert first_root(10, 0, 0, 0, 10) is None
+
+
+def test_first_root_of_quadratic_polynomial():
+    # falling from 450 with gravity 650
+    assert math.isclose(first_root(450, 0, -325, 0, 2), math.sqrt(450 / 325))
+    # going up first, then coming down
+    assert math.isclose(first_root(100, 500, -325, 0, 5), (500 + math.sqrt(500 ** 2 + 4 * 325 * 100)) / 650)
+
+
+def test_first_root_outside_of_the_window():
+    assert first_root(450, 0, -325, 0, 1) is None
+    assert first_root(450, 0, -325, 1.5, 2) is not None
+    assert first_root(100, -100, 0, 2, 3) == 2  # already below at the start
+    assert first_root(1, 0, 1, 0, 10) is None  # never below
+
+
+def test_interpolate_is_exact_for_multilinear_functions():
+    axes = [np.array([0.0, 1.0, 3.0]), np.array([-2.0, 0.0, 5.0, 6.0])]
+    x, y = np.meshgrid(*axes, indexing="ij")
+    values = 2 * x - 3 * y + x * y + 1
+
+    rng = np.random.default_rng(0)
+    px, py = rng.uniform(0, 3, 100), rng.uniform(-2, 6, 100)
+    expected = 2 * px - 3 * py + px * py + 1
+    assert np.allclose(interpolate(axes, values, [px, py]), expected)
+
+
+def test_interpolate_hits_grid_points_and_clamps_outside():
+    axes = [np.array([0.0, 1.0, 2.0])]
+    values = np.array([5.0, 7.0, 4.0])
+    assert np.allclose(interpolate(axes, values, [axes[0]]), values)
+    assert np.allclose(interpolate(axes, values, [[-1.0, 3.0]]), [5.0, 4.0])
+
+
+def test_interpolate_broadcasts_coordinates():
+    axes = [np.array([0.0, 1.0]), np.array([0.0, 1.0])]
+    values = np.array([[0.0, 1.0], [2.0, 3.0]])
+    assert interpolate(axes, values, [np.array([0.0, 0.5, 1.0]), 0.5]).shape == (3,)
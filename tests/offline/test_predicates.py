@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("rlutilities.simulation", exc_type=ImportError)
+
+from tools.predicates import Predicate, AllOf, HeightBand, MinimumTime, BallSpeed, JumpReach  # noqa: E402
+
+
+def slices(heights, times=None, velocities=None):
+    n = len(heights)
+    positions = np.zeros((n, 3))
+    positions[:, 2] = heights
+    times = np.zeros(n) if times is None else np.asarray(times, dtype=float)
+    velocities = np.zeros((n, 3)) if velocities is None else np.asarray(velocities, dtype=float)
+    return times, positions, velocities
+
+
+def make_car(height=17.0, vertical_speed=0.0):
+    return SimpleNamespace(time=0.0, position=np.array([0.0, 0.0, height]),
+                           velocity=np.array([0.0, 0.0, vertical_speed]), orientation=np.eye(3))
+
+
+def test_predicate_needs_evaluate():
+    with pytest.raises(TypeError):
+        Predicate()
+
+    class Incomplete(Predicate):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_height_band_is_strict():
+    times, positions, velocities = slices([100, 200, 250, 300])
+    mask = HeightBand(100, 300).evaluate(make_car(), times, positions, velocities)
+    assert mask.tolist() == [False, True, True, False]
+
+
+def test_minimum_time_grows_with_height():
+    times, positions, velocities = slices([100, 300, 300], times=[1.0, 1.0, 2.0])
+    mask = MinimumTime(100, 300, 0.5, 1.5).evaluate(make_car(), times, positions, velocities)
+    assert mask.tolist() == [True, False, True]
+
+
+def test_ball_speed_along_floor_normal():
+    times, positions, velocities = slices([100, 100], velocities=[[2000, 0, 0], [0, 0, 2000]])
+    assert BallSpeed(maximum=500, normal_to=["floor"]).evaluate(make_car(), times, positions, velocities).tolist() \
+        == [True, False]
+
+
+def test_and_flattens_and_combines():
+    combined = HeightBand(high=300) & HeightBand(low=100) & MinimumTime(0, 1, 0, 0)
+    assert isinstance(combined, AllOf) and len(combined.predicates) == 3
+
+    times, positions, velocities = slices([50, 150, 350], times=[1, 1, 1])
+    assert combined.evaluate(make_car(), times, positions, velocities).tolist() == [False, True, False]
+
+
+def test_jump_reach_from_flat_ground():
+    # a double jump rises by about 490, so it reaches the middle of DoubleJumpStrike's height band, not its top
+    times, positions, velocities = slices([240, 260, 500, 550])
+    assert JumpReach().evaluate(make_car(), times, positions, velocities).tolist() == [True, False, False, False]
+    assert JumpReach(double_jump=True).evaluate(make_car(), times, positions, velocities).tolist() \
+        == [True, True, True, False]
+
+
+def test_jump_reach_grows_with_vertical_speed():
+    times, positions, velocities = slices([550])
+    assert not JumpReach(double_jump=True).evaluate(make_car(), times, positions, velocities)[0]
+    assert JumpReach(double_jump=True).evaluate(make_car(vertical_speed=300), times, positions, velocities)[0]
@@ -0,0 +1,38 @@
+import numpy as np
+
+from tools.reach_table import ReachTable, DISTANCES, ANGLES, SPEEDS, BOOSTS
+
+
+def linear_times(distances, angles, speeds, boosts):
+    return 0.001 * distances + 0.5 * angles - 0.0002 * speeds - 0.003 * boosts + 1.0
+
+
+def linear_table() -> ReachTable:
+    grid = np.meshgrid(DISTANCES, ANGLES, SPEEDS, BOOSTS, indexing="ij")
+    return ReachTable(DISTANCES, ANGLES, SPEEDS, BOOSTS, linear_times(*grid))
+
+
+def test_lookup_is_exact_for_linear_times():
+    table = linear_table()
+    rng = np.random.default_rng(0)
+    distances = rng.uniform(DISTANCES[0], DISTANCES[-1], 200)
+    angles = rng.uniform(ANGLES[0], ANGLES[-1], 200)
+    speeds = rng.uniform(SPEEDS[0], SPEEDS[-1], 200)
+    boosts = rng.uniform(BOOSTS[0], BOOSTS[-1], 200)
+    np.testing.assert_allclose(table.lookup(distances, angles, speeds, boosts),
+                               linear_times(distances, angles, speeds, boosts), rtol=1e-6)
+
+
+def test_lookup_extrapolates_distance_and_clamps_the_other_axes():
+    table = linear_table()
+    far = DISTANCES[-1] + 1000
+    np.testing.assert_allclose(table.lookup(far, 0, 0, 0), linear_times(far, 0, 0, 0), rtol=1e-6)
+    np.testing.assert_allclose(table.lookup(1000, 0, SPEEDS[-1] + 1000, BOOSTS[-1] + 50),
+                               linear_times(1000, 0, SPEEDS[-1], BOOSTS[-1]), rtol=1e-6)
+
+
+def test_lookup_broadcasts():
+    table = linear_table()
+    distances = np.array([[500.0, 1000.0, 2000.0]])
+    boosts = np.array([[0.0], [50.0]])
+    assert table.lookup(distances, 0.3, 1000, boosts).shape == (2, 3)
@@ -0,0 +1,83 @@
+import numpy as np
+
+from tools.search import bracket_first_positive, sample_first_true, sample_first_true_from_hint
+
+
+def linear_first_positive(values) -> int:
+    return next((k for k, value in enumerate(values) if value > 0), len(values))
+
+
+def test_bracketing_matches_linear_scan_for_non_decreasing_values():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        n = int(rng.integers(0, 60))
+        values = np.sort(rng.normal(size=n))
+        for stride in (1, 3, 8):
+            assert bracket_first_positive(lambda k: values[k], n, stride) == linear_first_positive(values)
+
+
+def test_bracketing_scans_the_whole_bracket():
+    # not monotone inside the bracket (0, 8], a bisection would find 8
+    values = [-1, -1, 1, -1, -1, -1, -1, -1, 1, 1]
+    assert bracket_first_positive(lambda k: values[k], len(values), 8) == 2
+
+
+def test_bracketing_falls_back_to_linear_scan_when_values_decrease():
+    values = [-1, -1, -1, -1, -2, -2, -2, -2, -3, 1]
+    assert bracket_first_positive(lambda k: values[k], len(values), 4) == 0
+
+
+def test_bracketing_misses_window_between_samples():
+    # documented limitation, the reason Intercept.BRACKETING is opt-in
+    values = [-2, -1, 1, 1, -1, -1, -1, -1, -1, 1]
+    assert linear_first_positive(values) == 2
+    assert bracket_first_positive(lambda k: values[k], len(values), 4) != 2
+
+
+def runs(n: int, rng) -> np.ndarray:
+    """Random runs of true values, some of them shorter than the strides tested."""
+    values = np.zeros(n, dtype=bool)
+    for _ in range(rng.integers(0, 4)):
+        start = int(rng.integers(0, n))
+        values[start:start + int(rng.integers(1, 15))] = True
+    return values
+
+
+def test_sampling_finds_the_first_run_that_a_sample_hits():
+    rng = np.random.default_rng(1)
+    for _ in range(500):
+        values = runs(int(rng.integers(1, 80)), rng)
+        result = sample_first_true(lambda i: values[i], 0, len(values), 6)
+        if result is None:
+            assert not values[::6].any() and not values[-1]
+        else:
+            assert values[result] and not values[:result][::6].any()
+            # the first run that contains a sample is found from its start
+            assert result == 0 or not values[result - 1] or (result - 1) % 6 == 0
+
+
+def test_sampling_with_hint_never_finds_a_later_slice_than_without():
+    rng = np.random.default_rng(2)
+    for _ in range(500):
+        values = runs(int(rng.integers(1, 80)), rng)
+        test = lambda i: bool(values[i])
+        cold = sample_first_true(test, 0, len(values), 6)
+        hint = int(rng.integers(0, len(values)))
+        warm = sample_first_true_from_hint(test, len(values), 6, hint)
+
+        if values[hint]:
+            assert warm is not None and warm <= hint and values[warm]
+            assert cold is None or warm <= cold
+            # an earlier run that the samples hit is still found
+            if cold is not None and cold < hint:
+                assert warm == cold
+        else:
+            assert warm == cold
+
+
+def test_sampling_with_hint_keeps_a_short_run():
+    values = np.zeros(30, dtype=bool)
+    values[8:10] = True  # between the samples 6 and 12
+    test = lambda i: bool(values[i])
+    assert sample_first_true(test, 0, len(values), 6) is None
+    assert sample_first_true_from_hint(test, len(values), 6, 9) == 8
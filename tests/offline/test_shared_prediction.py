@@ -0,0 +1,75 @@
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("rlutilities.simulation", exc_type=ImportError)
+
+from tools.ball_prediction import BallPrediction  # noqa: E402
+from tools.shared_prediction import SharedPrediction  # noqa: E402
+
+
+def make_info(ball_time: float) -> SimpleNamespace:
+    return SimpleNamespace(ball_predictions=BallPrediction(), ball=SimpleNamespace(time=ball_time),
+                           latest_touch_time=0.0, cars=[], num_cars=0)
+
+
+def publish(publisher: SharedPrediction, ball_time: float):
+    info = make_info(ball_time)
+    data = np.zeros((10, BallPrediction.COLUMNS))
+    data[:, 0] = ball_time + np.arange(1, 11) / 60
+    info.ball_predictions.extend(data[:, 0], data[:, 1:4], data[:, 4:7], data[:, 7:10])
+    publisher.publish(info)
+
+
+@pytest.fixture
+def segment():
+    name = f"BotimusPredictionTest{uuid.uuid4().hex}"
+    publisher = SharedPrediction.connect(name)
+    reader = SharedPrediction.connect(name)
+    yield publisher, reader
+    reader.close()
+    publisher.close()
+
+
+def test_reader_views_the_published_slices(segment):
+    publisher, reader = segment
+    assert publisher.publisher and not reader.publisher
+
+    publish(publisher, 1.0)
+    info = make_info(1.0 + 1 / 60)
+    assert reader.read(info)
+
+    predictions = info.ball_predictions
+    assert predictions.is_view and not predictions.data.flags.writeable
+    assert np.allclose(predictions.time[:len(predictions)], 1.0 + np.arange(2, 11) / 60)
+    assert np.shares_memory(predictions.data, reader._slots[int(reader._header[0])][3])
+
+    # changing the slices copies them first
+    predictions.drop_prefix(1)
+    assert not predictions.is_view and len(predictions) == 8
+    assert predictions.time[0] == 1.0 + 3 / 60
+
+
+def test_view_is_invalid_once_the_publisher_rewrites_its_slot(segment):
+    publisher, reader = segment
+    publish(publisher, 1.0)
+    assert reader.read(make_info(1.0))
+
+    publish(publisher, 1.0 + 1 / 120)
+    assert reader.valid()
+    publish(publisher, 1.0 + 2 / 120)
+    assert not reader.valid()
+
+
+def test_stale_publisher_is_replaced():
+    name = f"BotimusPredictionTest{uuid.uuid4().hex}"
+    publisher = SharedPrediction.connect(name)
+    publisher._header[1] -= SharedPrediction.STALE_TIME + 1
+
+    successor = SharedPrediction.connect(name)
+    assert successor.publisher
+    successor.close()
+    publisher.publisher = False
+    publisher.close()
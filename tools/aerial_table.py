@@ -0,0 +1,156 @@
+"""
+Outcomes of aerials taken off from the ground, measured by simulating the RLUtilities Aerial mechanic,
+stored over a grid of (horizontal distance, height, time to arrival, speed towards the target, boost),
+for single and double jump takeoffs. The car faces the target when it takes off.
+Generate it with:
+
+    python -m tools.aerial_table
+
+This writes aerial_table.npy next to this file. The bot memory-maps it when it starts,
+so only the parts that are looked up are read, and processes running on the same machine share them.
+"""
+
+import math
+import os
+import warnings
+from typing import Optional
+
+import numpy as np
+
+from rlutilities.linear_algebra import vec3, look_at, norm, normalize
+from rlutilities.mechanics import Aerial
+from rlutilities.simulation import Car, Game
+from tools.ball_prediction import BallPrediction
+from tools.math import interpolate
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aerial_table.npy")
+
+DISTANCES = np.array([0, 250, 500, 750, 1000, 1500, 2000, 2500, 3000, 4000, 5000], dtype=np.float32)
+HEIGHTS = np.array([100, 300, 500, 700, 900, 1200, 1500, 1800, 2100], dtype=np.float32)
+TIMES = np.array([0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0], dtype=np.float32)
+SPEEDS = np.array([-500, 0, 500, 1000, 1400, 1800, 2300], dtype=np.float32)
+BOOSTS = np.array([0, 20, 40, 60, 100], dtype=np.float32)
+AXES = [DISTANCES, HEIGHTS, TIMES, SPEEDS, BOOSTS]
+
+SINGLE_JUMP = 0
+DOUBLE_JUMP = 1
+
+SIMULATION_DT = 1 / 120
+BOOST_USAGE = 33.3  # per second
+
+# same as AerialStrike
+ANGLE_THRESHOLD = 0.8
+CAR_HEIGHT = 17
+
+
+class AerialTable:
+    """
+    Distance between the car and the target at the end of an aerial, as (jump, distance, height, time,
+    speed, boost). Besides looking up a takeoff from the current state, it tells for whole ball predictions
+    which slices any takeoff could reach, when the car can drive anywhere first, and pick up boost on the way.
+    """
+
+    SHAPE = (2,) + tuple(len(axis) for axis in AXES)
+
+    def __init__(self, errors: np.ndarray):
+        assert errors.shape == self.SHAPE, "Aerial table doesn't match its axes"
+        self.errors = errors
+
+        # best case over distance, speed and boost, the car can also wait, so more time never hurts
+        self.best_errors = np.minimum.accumulate(np.min(errors, axis=(1, 4, 5)), axis=2)
+
+    @classmethod
+    def load(cls, path: str = TABLE_PATH) -> Optional["AerialTable"]:
+        """
+        The table stored at `path`, memory-mapped, or None if it hasn't been generated,
+        or was generated for other axes and has to be generated again.
+        """
+        if not os.path.exists(path):
+            return None
+        errors = np.load(path, mmap_mode="r")
+        if errors.shape != cls.SHAPE:
+            warnings.warn(f"{path} doesn't match the axes of the aerial table, generate it again")
+            return None
+        return cls(errors)
+
+    def save(self, path: str = TABLE_PATH):
+        np.save(path, np.asarray(self.errors, dtype=np.float16))
+
+    def lookup(self, jump: int, distances, heights, times, speeds, boosts) -> np.ndarray:
+        return interpolate(AXES, self.errors[jump], [distances, heights, times, speeds, boosts])
+
+    def car_error(self, car: Car, target: vec3, arrival_time: float, jump: int) -> float:
+        """Expected error of taking off now towards the target, for a car that is facing it."""
+        offset = target - car.position
+        ground_distance = math.hypot(offset[0], offset[1])
+        speed = (car.velocity[0] * offset[0] + car.velocity[1] * offset[1]) / max(ground_distance, 1e-9)
+        return float(self.lookup(jump, ground_distance, offset[2], arrival_time - car.time, speed, car.boost))
+
+    def possible_slices(self, car: Car, ball_predictions: BallPrediction, jump: int,
+                        max_error: float) -> np.ndarray:
+        """
+        Slices some takeoff could get within `max_error` of. The car might pick up boost before it takes off,
+        so it isn't limited by the boost it has now.
+        """
+        n = len(ball_predictions)
+        heights = ball_predictions.position[:n, 2] - car.position[2]
+        times = ball_predictions.time[:n] - car.time
+        return interpolate([HEIGHTS, TIMES], self.best_errors[jump], [heights, times]) < max_error
+
+
+def simulate_aerial(distance: float, height: float, time: float, speed: float, boost: float, jump: int) -> float:
+    """Distance from the target when the aerial finishes, with the target ahead of the car."""
+    target = vec3(0, distance / 2, CAR_HEIGHT + height)
+    forward = vec3(0, 1, 0)
+
+    car = Car()
+    car.position = vec3(0, -distance / 2, CAR_HEIGHT + 0.01)
+    car.velocity = forward * speed
+    car.angular_velocity = vec3(0, 0, 0)
+    car.orientation = look_at(forward, vec3(0, 0, 1))
+    car.boost = int(boost)
+    car.on_ground = True
+    car.time = 0.0
+
+    aerial = Aerial(car)
+    aerial.target = target
+    aerial.arrival_time = time
+    aerial.angle_threshold = ANGLE_THRESHOLD
+    aerial.up = normalize(vec3(0, -1, 0.5))
+    aerial.single_jump = jump == SINGLE_JUMP
+
+    # boost depletion in the RLUtilities car simulation isn't reliable, keep track of it here,
+    # the same way as AerialStrike.simulate_flight
+    while not aerial.finished:
+        aerial.step(SIMULATION_DT)
+        if aerial.controls.boost:
+            boost = max(boost - BOOST_USAGE * SIMULATION_DT, 0)
+        car.boost = int(boost)
+        car.step(aerial.controls, SIMULATION_DT)
+
+    return norm(car.position - target)
+
+
+def generate() -> AerialTable:
+    errors = np.zeros((2,) + tuple(len(axis) for axis in AXES), dtype=np.float32)
+    for jump in (SINGLE_JUMP, DOUBLE_JUMP):
+        for i, distance in enumerate(DISTANCES):
+            print(f"{'double' if jump == DOUBLE_JUMP else 'single'} jump, distance {distance:.0f}")
+            for j, height in enumerate(HEIGHTS):
+                for k, time in enumerate(TIMES):
+                    for m, speed in enumerate(SPEEDS):
+                        for b, boost in enumerate(BOOSTS):
+                            errors[jump, i, j, k, m, b] = simulate_aerial(float(distance), float(height),
+                                                                          float(time), float(speed),
+                                                                          float(boost), jump)
+
+    # more boost never makes the aerial worse, smooth out simulation noise that says otherwise
+    errors = np.minimum.accumulate(errors, axis=5)
+    return AerialTable(errors)
+
+
+if __name__ == "__main__":
+    Game.set_mode("soccar")
+    table = generate()
+    table.save()
+    print(f"saved to {TABLE_PATH}")
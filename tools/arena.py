@@ -1,11 +1,28 @@
+import math
+from typing import Sequence, Tuple, List
+
+import numpy as np
+
 from rlutilities.linear_algebra import vec3
-from tools.math import abs_clamp
+from tools.math import abs_clamp, first_root
 
 
 class Arena:
 
     size = vec3(4096, 5120, 2044)
 
+    # the corner walls lie roughly on |x| + |y| = corner
+    corner = 8064
+
+    FLOOR = "floor"
+    CEILING = "ceiling"
+    SIDE_WALLS = "side walls"
+    BACK_WALLS = "back walls"
+    CORNERS = "corners"
+    SURFACES = (FLOOR, CEILING, SIDE_WALLS, BACK_WALLS, CORNERS)
+
+    GRAVITY = -650
+
     @classmethod
     def clamp(cls, pos: vec3, offset: float = 0) -> vec3:
         return vec3(
@@ -17,3 +34,74 @@ class Arena:
     @classmethod
     def inside(cls, pos: vec3, offset: float = 0) -> bool:
         return abs(pos[0]) < cls.size[0] - offset and abs(pos[1]) < cls.size[1] - offset
+
+    @classmethod
+    def surface_distances(cls, positions: np.ndarray,
+                          surfaces: Sequence[str] = SURFACES) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distances of an (n x 3) array of positions to the closest of the given surfaces,
+        and the inward normals of those surfaces. The arena is approximated by flat planes,
+        without the curved transitions between them, and the goals are ignored.
+        """
+        x, y, z = positions[:, 0], positions[:, 1], positions[:, 2]
+        sign_x = np.where(x < 0, -1.0, 1.0)
+        sign_y = np.where(y < 0, -1.0, 1.0)
+        zeros, ones = np.zeros(len(positions)), np.ones(len(positions))
+
+        planes = {
+            cls.FLOOR: (z, (zeros, zeros, ones)),
+            cls.CEILING: (cls.size[2] - z, (zeros, zeros, -ones)),
+            cls.SIDE_WALLS: (cls.size[0] - np.abs(x), (-sign_x, zeros, zeros)),
+            cls.BACK_WALLS: (cls.size[1] - np.abs(y), (zeros, -sign_y, zeros)),
+            cls.CORNERS: ((cls.corner - np.abs(x) - np.abs(y)) / math.sqrt(2),
+                          (-sign_x / math.sqrt(2), -sign_y / math.sqrt(2), zeros)),
+        }
+        distances = np.stack([planes[surface][0] for surface in surfaces])
+        normals = np.stack([np.stack(planes[surface][1], axis=1) for surface in surfaces])
+
+        closest = np.argmin(distances, axis=0)
+        indices = np.arange(len(positions))
+        return distances[closest, indices], normals[closest, indices]
+
+    @classmethod
+    def ballistic_contacts(cls, position: vec3, velocity: vec3, radius: float, earliest: float,
+                           latest: float) -> List[Tuple[float, vec3, vec3]]:
+        """
+        Times in [earliest, latest] from now at which a sphere flying along a ballistic path first touches
+        each of the surfaces of `surface_distances`, with the position of the sphere and the inward normal
+        of the surface, ordered by time. Each plane only needs solving a linear or quadratic equation.
+        The arena is the intersection of the half-spaces behind these planes, so the first contact
+        is usually where the sphere lands. But the goals and the curved transitions aren't part of it:
+        a sphere can fly through a goal mouth past the back wall plane, so callers should confirm
+        the contacts. Planes the sphere's center is already past, like the back wall for a car inside a goal,
+        are skipped.
+        """
+        x, y, z = position[0], position[1], position[2]
+        vx, vy, vz = velocity[0], velocity[1], velocity[2]
+        half_g = cls.GRAVITY / 2
+        diagonal = 1 / math.sqrt(2)
+
+        # distance from each plane minus the radius, as coefficients of a polynomial in time, and the normal
+        planes = [
+            ((z - radius, vz, half_g), vec3(0, 0, 1)),
+            ((cls.size[2] - z - radius, -vz, -half_g), vec3(0, 0, -1)),
+        ]
+        for sign in (-1, 1):
+            planes.append(((cls.size[0] - sign * x - radius, -sign * vx, 0), vec3(-sign, 0, 0)))
+            planes.append(((cls.size[1] - sign * y - radius, -sign * vy, 0), vec3(0, -sign, 0)))
+            for sign_y in (-1, 1):
+                offset = (cls.corner - sign * x - sign_y * y) * diagonal - radius
+                planes.append(((offset, -(sign * vx + sign_y * vy) * diagonal, 0),
+                               vec3(-sign * diagonal, -sign_y * diagonal, 0)))
+
+        contacts = []
+        for (c0, c1, c2), normal in planes:
+            if c0 + radius < 0:
+                continue
+            time = first_root(c0, c1, c2, earliest, latest)
+            if time is not None:
+                contact_position = position + velocity * time + vec3(0, 0, half_g * time ** 2)
+                contacts.append((time, contact_position, normal))
+
+        contacts.sort(key=lambda contact: contact[0])
+        return contacts
@@ -0,0 +1,74 @@
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+def solve_assignment(costs: np.ndarray) -> np.ndarray:
+    """
+    Optimal assignment of rows to columns of an (n x m) cost matrix with n <= m, minimizing the total cost.
+    Returns the column assigned to each row. Uses SciPy if it's installed, otherwise the Hungarian algorithm below.
+    """
+    n, m = costs.shape
+    assert n <= m, f"Can't assign {n} rows to {m} columns"
+    if n == 0:
+        return np.zeros(0, dtype=int)
+
+    if linear_sum_assignment is not None:
+        rows, columns = linear_sum_assignment(costs)
+        return columns[np.argsort(rows)]
+    return hungarian(costs)
+
+
+def hungarian(costs: np.ndarray) -> np.ndarray:
+    """
+    Hungarian algorithm with potentials, O(n^2 m), with the inner loop over columns vectorized.
+    Rows and columns are 1-indexed internally, column 0 is a sentinel.
+    """
+    n, m = costs.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    assigned_row = np.zeros(m + 1, dtype=int)  # row assigned to each column, 0 if none
+    way = np.zeros(m + 1, dtype=int)
+
+    for i in range(1, n + 1):
+        assigned_row[0] = i
+        j0 = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        # grow an alternating tree from row i until it reaches a free column
+        while True:
+            used[j0] = True
+            i0 = assigned_row[j0]
+
+            slack = costs[i0 - 1] - u[i0] - v[1:]
+            improved = ~used[1:] & (slack < min_slack[1:])
+            min_slack[1:][improved] = slack[improved]
+            way[1:][improved] = j0
+
+            free_slack = np.where(used[1:], np.inf, min_slack[1:])
+            j1 = int(np.argmin(free_slack)) + 1
+            delta = free_slack[j1 - 1]
+
+            u[assigned_row[used]] += delta
+            v[used] -= delta
+            min_slack[~used] -= delta
+
+            j0 = j1
+            if assigned_row[j0] == 0:
+                break
+
+        # flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            assigned_row[j0] = assigned_row[j1]
+            j0 = j1
+
+    columns = np.zeros(n, dtype=int)
+    for j in range(1, m + 1):
+        if assigned_row[j]:
+            columns[assigned_row[j] - 1] = j - 1
+    return columns
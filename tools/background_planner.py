@@ -0,0 +1,131 @@
+import threading
+from typing import Callable, Optional, Tuple
+
+from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket
+
+from maneuvers.maneuver import Maneuver
+from tools.ball_prediction import LOCAL_RLUTILITIES
+from tools.game_info import GameInfo
+
+
+class Proposal:
+    def __init__(self, info: GameInfo, maneuver: Maneuver, kickoff_pause: bool):
+        self.info = info
+        self.maneuver = maneuver
+        self.time = info.time
+        self.touch_time = info.latest_touch_time
+        self.kickoff_pause = kickoff_pause
+
+
+class BackgroundPlanner:
+    """
+    Prepares a proposal for the next maneuver in a worker thread, while the current maneuver executes.
+
+    The worker only plans when the tick thread asks for it with `request`, once per request. It plans on a snapshot:
+    copies of the packet and the field info, read into a spare GameInfo that simulates the ball itself,
+    so the worker never reads the framework's ball prediction or shared memory.
+    The maneuvers it creates reference that GameInfo and its cars, so when a proposal is taken, the spare GameInfo
+    becomes the live one, and the previous live GameInfo becomes the spare.
+
+    A proposal is stale once it's older than MAX_PROPOSAL_AGE, when the ball has been touched since,
+    or when a kickoff pause started or ended since, e.g. after a goal. `invalidate` drops it right away.
+
+    The worker shares the GIL with the game loop, so it only takes work off the ticks where planning
+    spends its time in RLUtilities or NumPy calls that release the GIL. While it runs Python code,
+    ticks wait for it instead. Measure it with `python -m tools.benchmark background_planning`.
+    """
+
+    MAX_PROPOSAL_AGE = 0.1
+
+    def __init__(self, spare_info: GameInfo, plan: Callable[[GameInfo], Optional[Maneuver]]):
+        self._spare_info = spare_info
+        self._plan = plan
+
+        self._condition = threading.Condition()
+        self._request: Optional[Tuple[GameTickPacket, FieldInfoPacket]] = None
+        self._planning = False
+        self._proposal: Optional[Proposal] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="BackgroundPlanner", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+
+    def busy(self) -> bool:
+        """Whether the worker still has a request to plan."""
+        with self._condition:
+            return self._request is not None or self._planning
+
+    def request(self, packet: GameTickPacket, field_info: FieldInfoPacket):
+        """
+        Ask for a proposal planned from this packet, replacing the current one. Ignored while the worker is busy.
+        The framework reuses packet objects, so they are copied.
+        """
+        if self.busy():
+            return
+        packet = type(packet).from_buffer_copy(packet)
+        field_info = type(field_info).from_buffer_copy(field_info)
+        with self._condition:
+            self._request = packet, field_info
+            self._proposal = None
+            self._condition.notify()
+
+    def invalidate(self):
+        """Drop the current proposal, e.g. because a kickoff starts or the ball has been touched."""
+        with self._condition:
+            self._proposal = None
+
+    def has_fresh_proposal(self, packet: GameTickPacket) -> bool:
+        with self._condition:
+            return self._proposal is not None and self._is_fresh(self._proposal, packet)
+
+    def take(self, live_info: GameInfo, packet: GameTickPacket) -> Optional[Proposal]:
+        """
+        The current proposal, if it's still fresh at this packet. The caller has to switch to
+        the proposal's GameInfo, and must not use `live_info` anymore, because it's handed to the worker.
+        """
+        with self._condition:
+            proposal = self._proposal
+            if proposal is None or not self._is_fresh(proposal, packet):
+                return None
+
+            self._proposal = None
+            self._spare_info = live_info
+            return proposal
+
+    def _is_fresh(self, proposal: Proposal, packet: GameTickPacket) -> bool:
+        return (
+            packet.game_info.seconds_elapsed - proposal.time <= self.MAX_PROPOSAL_AGE
+            and packet.game_ball.latest_touch.time_seconds == proposal.touch_time
+            and packet.game_info.is_kickoff_pause == proposal.kickoff_pause
+        )
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: not self._running or self._request is not None)
+                if not self._running:
+                    return
+
+                packet, field_info = self._request
+                self._request = None
+                self._planning = True
+                info = self._spare_info
+
+            info.set_prediction_source(LOCAL_RLUTILITIES)
+            info.read_packet(packet, field_info)
+            info.predict_ball()
+            maneuver = self._plan(info)
+
+            with self._condition:
+                self._planning = False
+                if maneuver is not None:
+                    self._proposal = Proposal(info, maneuver, bool(packet.game_info.is_kickoff_pause))
@@ -0,0 +1,403 @@
+import math
+from typing import Dict, Iterator, Sequence, Tuple, List, Optional
+
+import numpy as np
+
+from rlutilities.linear_algebra import vec3
+from rlutilities.simulation import Ball
+from tools.arena import Arena
+
+
+# where GameInfo.predict_ball gets the ball prediction from
+LOCAL_RLUTILITIES = "local rlutilities"
+FRAMEWORK_STRUCT = "framework struct"
+SHARED_MEMORY = "shared memory"  # published by a teammate's process, see SharedPrediction
+
+# A resolution schedule is a sequence of (time from now, dt) pairs, ordered by time.
+# Slices up to each time are predicted with the paired dt, the last pair should cover the whole horizon.
+Resolution = Sequence[Tuple[float, float]]
+
+# dense near-term slices for strategy code, coarse ones far ahead for intercepts and positioning
+MULTI_RESOLUTION: Resolution = ((1.5, 1 / 120), (3.0, 1 / 60), (math.inf, 1 / 30))
+
+
+def uniform_resolution(dt: float) -> Resolution:
+    return (math.inf, dt),
+
+
+def resolution_dt(resolution: Resolution, times_from_now: np.ndarray) -> np.ndarray:
+    """The dt the schedule requires for slices starting at the given times from now."""
+    ends = np.array([end for end, _ in resolution])
+    dts = np.array([dt for _, dt in resolution])
+    segments = np.minimum(np.searchsorted(ends, times_from_now, side="right"), len(resolution) - 1)
+    return dts[segments]
+
+
+def resolution_times(resolution: Resolution, now: float, start: float, end: float) -> np.ndarray:
+    """Slice times the schedule produces when stepping from `start` until reaching `end`."""
+    segments = []
+    time = start
+    for segment_end, dt in resolution:
+        segment_end = min(now + segment_end, end)
+        if time < segment_end:
+            count = int(math.ceil((segment_end - time) / dt - 1e-9))
+            segments.append(time + dt * np.arange(1, count + 1))
+            time = segments[-1][-1]
+    return np.concatenate(segments) if segments else np.zeros(0)
+
+
+# A ball resting or rolling on the floor without slipping is only slowed down by drag,
+# so its velocity decays exponentially and its path has a closed form.
+# Near walls the floor curves up, and with spin or vertical speed the ball slips or bounces,
+# there the ball has to be simulated.
+# The spin of the ball is capped at Ball.max_omega, so only balls slower than about 550 uu/s can roll
+# without slipping. Faster balls on the floor slip, and are simulated too.
+MAX_ROLLING_SPEED = Ball.max_omega * Ball.radius
+ROLLING_HEIGHT_TOLERANCE = 2
+ROLLING_VERTICAL_SPEED_TOLERANCE = 1
+ROLLING_SPIN_TOLERANCE = 0.1
+ROLLING_WALL_MARGIN = 400
+ROLLING_CORNER_LIMIT = 7000  # |x| + |y|, a bit before the corner walls
+
+
+def inside_rolling_area(positions: np.ndarray) -> np.ndarray:
+    x, y = np.abs(positions[:, 0]), np.abs(positions[:, 1])
+    return (
+        (x < Arena.size[0] - ROLLING_WALL_MARGIN)
+        & (y < Arena.size[1] - ROLLING_WALL_MARGIN)
+        & (x + y < ROLLING_CORNER_LIMIT)
+    )
+
+
+def is_rolling(ball: Ball) -> bool:
+    """Whether the ball rests or rolls on the floor without slipping, away from the walls."""
+    position, velocity, angular_velocity = ball.position, ball.velocity, ball.angular_velocity
+    if (
+        position[2] > Ball.collision_radius + ROLLING_HEIGHT_TOLERANCE
+        or abs(velocity[2]) > ROLLING_VERTICAL_SPEED_TOLERANCE
+        or math.hypot(velocity[0], velocity[1]) > MAX_ROLLING_SPEED
+        or not inside_rolling_area(np.array([[position[0], position[1], position[2]]]))[0]
+    ):
+        return False
+
+    # rolling without slipping means the contact point doesn't move: angular velocity = up x velocity / radius
+    spin_error = np.linalg.norm([angular_velocity[0] + velocity[1] / Ball.radius,
+                                 angular_velocity[1] - velocity[0] / Ball.radius,
+                                 angular_velocity[2]])
+    return spin_error < ROLLING_SPIN_TOLERANCE
+
+
+def roll(ball: Ball, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Positions, velocities and angular velocities of a rolling ball at the given times,
+    cut off before the first slice that leaves the area where the closed form holds.
+    """
+    position, velocity = ball.position, ball.velocity
+    initial_position = np.array([position[0], position[1], position[2]])
+    initial_velocity = np.array([velocity[0], velocity[1], 0.0])
+    initial_angular_velocity = np.array([-velocity[1], velocity[0], 0.0]) / Ball.radius
+
+    decay = np.exp(Ball.drag * (times - ball.time))[:, np.newaxis]
+    positions = initial_position + (decay - 1) / Ball.drag * initial_velocity
+    velocities = decay * initial_velocity
+    angular_velocities = decay * initial_angular_velocity
+
+    outside = np.flatnonzero(~inside_rolling_area(positions))
+    count = outside[0] if len(outside) else len(times)
+    return positions[:count], velocities[:count], angular_velocities[:count]
+
+
+# layout of a slice in RLBot's BallPrediction struct, in floats:
+# location (3), rotation (3), velocity (3), angular velocity (3), game seconds (1)
+_STRUCT_SLICE_FLOATS = 13
+_STRUCT_LOCATION = slice(0, 3)
+_STRUCT_VELOCITY = slice(6, 9)
+_STRUCT_ANGULAR_VELOCITY = slice(9, 12)
+_STRUCT_GAME_SECONDS = 12
+
+
+class BallPrediction:
+    """
+    Preallocated structure-of-arrays buffer of predicted ball slices.
+
+    `time`, `position`, `velocity` and `angular_velocity` are column views into a single array,
+    which is filled in place, so predicting the ball doesn't allocate anything per slice.
+    Indexing the buffer still returns a `Ball`, so it can be used like the list of balls it replaces.
+    These balls are created lazily, only for slices that are actually accessed.
+
+    `version` is incremented whenever existing slices change or move, but not when slices are appended,
+    so results computed from the buffer can tell whether they still refer to the same slices.
+
+    With `view`, slices stored elsewhere (like in shared memory) are used in place, without copying them.
+    They are read-only, changing them copies them into the buffer first. Reach times computed along with them
+    can be stored in `known_reach_times`, keyed by car id and car time, they are dropped whenever the version changes.
+    """
+
+    COLUMNS = 10  # time, position, velocity, angular velocity
+
+    def __init__(self, capacity: int = 720):
+        self.length = 0
+        self.version = 0
+        self.known_reach_times: Dict[Tuple[int, float], np.ndarray] = {}
+        self._balls: Dict[int, Ball] = {}
+        self._events: Optional[BallPredictionEvents] = None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        data = np.zeros((capacity, self.COLUMNS))
+        if hasattr(self, "_data"):
+            data[:self.length] = self._data[:self.length]
+        self._own_data = data
+        self._use(data)
+
+    def _use(self, data: np.ndarray):
+        self._data = data
+        self.time = data[:, 0]
+        self.position = data[:, 1:4]
+        self.velocity = data[:, 4:7]
+        self.angular_velocity = data[:, 7:10]
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    @property
+    def events(self) -> "BallPredictionEvents":
+        """Trajectory features of the current prediction, computed on first access after it changes."""
+        if self._events is None:
+            self._events = BallPredictionEvents(self)
+        return self._events
+
+    @property
+    def data(self) -> np.ndarray:
+        """The slices as rows of `COLUMNS` values."""
+        return self._data[:self.length]
+
+    @property
+    def is_view(self) -> bool:
+        return self._data is not self._own_data
+
+    def view(self, data: np.ndarray):
+        """Use the given rows of `COLUMNS` values as the slices, read-only and without copying them."""
+        self.clear()
+        data = data.view()
+        data.flags.writeable = False
+        self._use(data)
+        self.length = len(data)
+
+    def _detach(self):
+        """Copy viewed slices into the own buffer, before they are changed."""
+        if self.is_view:
+            self._allocate(max(len(self._own_data), self.length))
+
+    def clear(self):
+        if self.is_view:
+            self._use(self._own_data)
+        self.length = 0
+        self.version += 1
+        self.known_reach_times.clear()
+        self._balls.clear()
+        self._events = None
+
+    def truncate(self, length: int):
+        """Keep only the first `length` slices."""
+        if length < self.length:
+            self.length = length
+            self.version += 1
+            self.known_reach_times.clear()
+            self._balls = {i: ball for i, ball in self._balls.items() if i < length}
+            self._events = None
+
+    def drop_prefix(self, count: int):
+        """Remove the first `count` slices, shifting the rest to the front of the buffer."""
+        count = min(count, self.length)
+        if count == 0:
+            return
+
+        self._detach()
+        self._data[:self.length - count] = self._data[count:self.length]
+        self.version += 1
+        self.known_reach_times.clear()
+        self.length -= count
+        self._balls = {i - count: ball for i, ball in self._balls.items() if i >= count}
+        self._events = None
+
+    def compact(self, indices: np.ndarray):
+        """Keep only the slices at the given (increasing) indices."""
+        count = len(indices)
+        self._detach()
+        self._data[:count] = self._data[indices]
+        self.length = count
+        self.version += 1
+        self.known_reach_times.clear()
+        self._balls.clear()
+        self._events = None
+
+    def first_violation(self, resolution: Resolution, now: float, slack: float = 0.0) -> int:
+        """
+        Index of the first slice that is further from its predecessor than the schedule allows,
+        or the length of the buffer if all slices are dense enough.
+        Slices become too coarse when a multi-resolution prediction is reused a while later.
+        With `slack`, coarse slices may come that many seconds closer before they count as too coarse.
+        """
+        times = self.time[:self.length]
+        gaps = np.diff(times, prepend=now)
+        allowed = resolution_dt(resolution, times - gaps - now + slack)
+        violations = np.flatnonzero(gaps > allowed + 1e-6)
+        return int(violations[0]) if len(violations) else self.length
+
+    def resample(self, resolution: Resolution, now: float):
+        """Thin out slices which are denser than the schedule requires, keeping the first slice of every step."""
+        times_from_now = self.time[:self.length] - now
+        dts = resolution_dt(resolution, times_from_now)
+        ends = np.array([end for end, _ in resolution])
+        segments = np.searchsorted(ends, times_from_now, side="right")
+        steps = np.floor(times_from_now / dts + 1e-3)
+        _, indices = np.unique(np.stack([segments, steps], axis=1), axis=0, return_index=True)
+        self.compact(np.sort(indices))
+
+    def append(self, ball: Ball):
+        self._detach()
+        if self.length == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        pos, vel, ang_vel = ball.position, ball.velocity, ball.angular_velocity
+        self._data[self.length] = (ball.time,
+                                   pos[0], pos[1], pos[2],
+                                   vel[0], vel[1], vel[2],
+                                   ang_vel[0], ang_vel[1], ang_vel[2])
+        self.length += 1
+        self._events = None
+
+    def extend(self, times: np.ndarray, positions: np.ndarray, velocities: np.ndarray,
+               angular_velocities: np.ndarray):
+        """Append many slices at once."""
+        count = len(positions)
+        self._detach()
+        while self.length + count > self.capacity:
+            self._allocate(self.capacity * 2)
+
+        end = self.length + count
+        self.time[self.length:end] = times[:count]
+        self.position[self.length:end] = positions
+        self.velocity[self.length:end] = velocities
+        self.angular_velocity[self.length:end] = angular_velocities
+        self.length = end
+        self._events = None
+
+    def read_struct(self, ball_prediction_struct):
+        """
+        Copy the slices of RLBot's BallPrediction struct into the buffer.
+        The struct is read through a NumPy view of its memory, so no per-slice Python objects are created.
+        """
+        n = ball_prediction_struct.num_slices
+        raw = np.frombuffer(ball_prediction_struct.slices, dtype=np.float32)
+        raw = raw.reshape(-1, _STRUCT_SLICE_FLOATS)[:n]
+
+        self.clear()
+        if n > self.capacity:
+            self._allocate(n)
+
+        self.time[:n] = raw[:, _STRUCT_GAME_SECONDS]
+        self.position[:n] = raw[:, _STRUCT_LOCATION]
+        self.velocity[:n] = raw[:, _STRUCT_VELOCITY]
+        self.angular_velocity[:n] = raw[:, _STRUCT_ANGULAR_VELOCITY]
+        self.length = n
+
+    def position_at(self, index: int) -> vec3:
+        return vec3(*self.position[index])
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __bool__(self) -> bool:
+        return self.length > 0
+
+    def __getitem__(self, index: int) -> Ball:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("ball prediction index out of range")
+
+        ball = self._balls.get(index)
+        if ball is None:
+            ball = Ball()
+            ball.time = self.time[index]
+            ball.position = vec3(*self.position[index])
+            ball.velocity = vec3(*self.velocity[index])
+            ball.angular_velocity = vec3(*self.angular_velocity[index])
+            self._balls[index] = ball
+        return ball
+
+    def __iter__(self) -> Iterator[Ball]:
+        for i in range(self.length):
+            yield self[i]
+
+
+class BallPredictionEvents:
+    """
+    Index of trajectory features of a ball prediction, so that code looking for them
+    doesn't have to test every slice. All events are arrays of slice indices.
+    """
+
+    # how close to a surface the ball has to be when it bounces, for the bounce to count as a contact with it
+    CONTACT_MARGIN = 50
+
+    def __init__(self, prediction: BallPrediction):
+        n = len(prediction)
+        self._prediction = prediction
+        self._height_bands: Dict[Tuple[float, float], np.ndarray] = {}
+        self._ground_contacts: Dict[float, np.ndarray] = {}
+
+        position = prediction.position[:n]
+        velocity = prediction.velocity[:n]
+        previous_velocity = np.concatenate([velocity[:1], velocity[:-1]])
+        surface_distance = Ball.radius + self.CONTACT_MARGIN
+
+        # the vertical velocity turns upwards near the floor
+        self.ground_bounces = np.flatnonzero(
+            (previous_velocity[:, 2] < 0) & (velocity[:, 2] > 0) & (position[:, 2] < surface_distance))
+
+        # the vertical velocity turns downwards in the air
+        self.apexes = np.flatnonzero((previous_velocity[:, 2] > 0) & (velocity[:, 2] <= 0))
+
+        # the horizontal velocity changes direction near the side or back walls
+        near_wall = (
+            (np.abs(position[:, 0]) > Arena.size[0] - surface_distance)
+            | (np.abs(position[:, 1]) > Arena.size[1] - surface_distance)
+        )
+        direction_changed = np.any(np.sign(previous_velocity[:, :2]) * np.sign(velocity[:, :2]) < 0, axis=1)
+        self.wall_contacts = np.flatnonzero(near_wall & direction_changed)
+
+        # the ball goes past a goal line, including when it starts there
+        behind_goal_line = np.abs(position[:, 1]) > Arena.size[1]
+        previously_behind = np.concatenate([[False], behind_goal_line[:-1]])
+        self.goal_line_crossings = np.flatnonzero(behind_goal_line & ~previously_behind)
+
+    def height_band(self, low: float, high: float) -> np.ndarray:
+        """Indices of slices where the ball is between the given heights (inclusive)."""
+        key = low, high
+        if key not in self._height_bands:
+            height = self._prediction.position[:len(self._prediction), 2]
+            self._height_bands[key] = np.flatnonzero((low <= height) & (height <= high))
+        return self._height_bands[key]
+
+    def ground_contacts(self, height: float) -> np.ndarray:
+        """Indices of slices where the ball is at `height` or lower, and not going up."""
+        if height not in self._ground_contacts:
+            n = len(self._prediction)
+            position, velocity = self._prediction.position[:n], self._prediction.velocity[:n]
+            self._ground_contacts[height] = np.flatnonzero((position[:, 2] <= height) & (velocity[:, 2] <= 0))
+        return self._ground_contacts[height]
+
+    def height_band_ranges(self, low: float, high: float) -> List[Tuple[float, float]]:
+        """Time ranges (first and last slice time) during which the ball stays between the given heights."""
+        indices = self.height_band(low, high)
+        if not len(indices):
+            return []
+
+        breaks = np.flatnonzero(np.diff(indices) > 1)
+        starts = np.concatenate([[indices[0]], indices[breaks + 1]])
+        ends = np.concatenate([indices[breaks], [indices[-1]]])
+        times = self._prediction.time
+        return [(times[start], times[end]) for start, end in zip(starts, ends)]
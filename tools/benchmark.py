@@ -0,0 +1,242 @@
+"""
+Benchmarks for the performance-sensitive parts of the bot.
+They need RLUtilities, but not a running game. Run them from the repository root:
+
+    python -m tools.benchmark [name ...]
+
+Without arguments, all benchmarks are run.
+"""
+
+import random
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from rlutilities.linear_algebra import vec3, normalize, look_at
+from rlutilities.simulation import Ball, Game, Car
+from tools.ball_prediction import is_rolling, roll, resolution_times, uniform_resolution
+from tools.game_info import GameInfo
+from tools.intercept import Intercept
+
+
+def timed(function: Callable, repetitions: int) -> float:
+    """Average duration of a call in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        function()
+    return (time.perf_counter() - start) / repetitions * 1000
+
+
+def rolling_ball(position: vec3, velocity: vec3) -> Ball:
+    """A ball that has settled on the floor, rolling roughly with the given velocity."""
+    ball = Ball()
+    ball.position = position
+    ball.velocity = velocity
+    ball.angular_velocity = vec3(-velocity[1], velocity[0], 0) / Ball.radius
+    for _ in range(120):
+        ball.step(1 / 120)
+    return ball
+
+
+def benchmark_rolling_prediction():
+    """Closed-form rolling prediction against stepping the ball with RLUtilities."""
+    balls = [
+        rolling_ball(vec3(0, 0, 100), vec3(0, 0, 0)),
+        rolling_ball(vec3(-1000, 500, 100), vec3(200, -100, 0)),
+        rolling_ball(vec3(1500, -2000, 100), vec3(-300, 400, 0)),
+        rolling_ball(vec3(0, 1000, 100), vec3(450, 250, 0)),
+        rolling_ball(vec3(-500, -1500, 100), vec3(900, 600, 0)),  # too fast to roll, simulated
+    ]
+
+    print("rolling prediction, 6 seconds at 1/120 s")
+    for ball in balls:
+        if not is_rolling(ball):
+            print(f"  ball at {ball.position} isn't rolling after settling, skipped")
+            continue
+
+        times = resolution_times(uniform_resolution(1 / 120), ball.time, ball.time, ball.time + 6.0)
+        positions, _, _ = roll(ball, times)
+
+        def simulate():
+            simulated = Ball(ball)
+            for _ in range(len(positions)):
+                simulated.step(1 / 120)
+            return simulated
+
+        simulated_positions = []
+        simulated = Ball(ball)
+        for _ in range(len(positions)):
+            simulated.step(1 / 120)
+            p = simulated.position
+            simulated_positions.append((p[0], p[1], p[2]))
+        error = np.linalg.norm(positions - np.array(simulated_positions), axis=1)
+
+        closed_form_ms = timed(lambda: roll(ball, times), 100)
+        simulation_ms = timed(simulate, 10)
+        print(f"  speed {np.linalg.norm(positions[1] - positions[0]) * 120:6.0f}: "
+              f"{len(positions)} slices, max error {error.max():6.2f} uu, mean error {error.mean():6.2f} uu, "
+              f"closed form {closed_form_ms:.3f} ms, simulation {simulation_ms:.3f} ms")
+
+
+def random_cars(count: int, seed: int = 0) -> List[Car]:
+    """Cars on the ground, spread over the field, driving in random directions."""
+    rng = random.Random(seed)
+    cars = []
+    for _ in range(count):
+        car = Car()
+        car.position = vec3(rng.uniform(-3500, 3500), rng.uniform(-4500, 4500), 17)
+        car.velocity = vec3(rng.uniform(-1400, 1400), rng.uniform(-1400, 1400), 0)
+        car.orientation = look_at(normalize(vec3(rng.uniform(-1, 1), rng.uniform(-1, 1), 0)), vec3(0, 0, 1))
+        car.boost = rng.randint(0, 100)
+        cars.append(car)
+    return cars
+
+
+INTERCEPT_SCENARIOS = {
+    "lob towards car": (vec3(0, 3000, 300), vec3(0, -1200, 1200)),
+    "shot across": (vec3(-3000, 0, 150), vec3(2500, 300, 400)),
+    "high bounce": (vec3(1000, -2000, 1500), vec3(-300, 500, 0)),
+    "rolling": (vec3(500, 500, 93), vec3(800, -600, 0)),
+    "fast clear": (vec3(0, -4000, 200), vec3(500, 4000, 900)),
+}
+
+
+def predicted_scenario(info: GameInfo, position: vec3, velocity: vec3):
+    info.ball = Ball()
+    info.ball.position = position
+    info.ball.velocity = velocity
+    info.ball_predictions.clear()
+    info.predict_ball(time_limit=6.0, dt=1 / 120)
+
+
+def benchmark_intercept_search():
+    """Bracketing intercept search against the linear scan, both must find the same slices."""
+    info = GameInfo(0)
+    cars = random_cars(20)
+    low_balls = lambda car, ball: ball.position[2] < 300
+    cache, Intercept.cache = Intercept.cache, None
+
+    print("intercept search, 6 seconds at 1/120 s, 20 cars, forwards and backwards, with and without a predicate")
+    for name, (position, velocity) in INTERCEPT_SCENARIOS.items():
+        predicted_scenario(info, position, velocity)
+
+        cases = [(car, predicate, backwards) for car in cars
+                 for predicate in (None, low_balls) for backwards in (False, True)]
+
+        def search(mode: str):
+            return [Intercept(car, info.ball_predictions, predicate, backwards, search=mode).time
+                    for car, predicate, backwards in cases]
+
+        mismatches = sum(a != b for a, b in zip(search(Intercept.LINEAR), search(Intercept.BRACKETING)))
+        linear_ms = timed(lambda: search(Intercept.LINEAR), 5)
+        bracketing_ms = timed(lambda: search(Intercept.BRACKETING), 5)
+        print(f"  {name:16}: {mismatches} of {len(cases)} intercepts differ, "
+              f"linear {linear_ms:.2f} ms, bracketing {bracketing_ms:.2f} ms, speedup {linear_ms / bracketing_ms:.1f}x")
+
+    Intercept.cache = cache
+
+
+def benchmark_intercept_cache():
+    """Intercepts of several candidate strikes for the same car, with and without the shared cache."""
+    info = GameInfo(0)
+    cars = random_cars(20)
+    # stand-ins for the predicates of the strikes considered in one decision
+    predicates = [
+        lambda car, ball: ball.position[2] < 300,
+        lambda car, ball: ball.position[2] < 200,
+        lambda car, ball: 250 < ball.position[2] < 550,
+        lambda car, ball: ball.position[2] > 300,
+    ]
+    cache = Intercept.cache
+
+    print("intercept cache, 4 predicates forwards and backwards per car, 20 cars")
+    for name, (position, velocity) in INTERCEPT_SCENARIOS.items():
+        predicted_scenario(info, position, velocity)
+
+        def decide():
+            cache.clear()
+            return [Intercept(car, info.ball_predictions, predicate, backwards).time
+                    for car in cars for predicate in predicates for backwards in (False, True)]
+
+        cached = decide()
+        Intercept.cache = None
+        uncached = decide()
+        uncached_ms = timed(decide, 3)
+        Intercept.cache = cache
+        cached_ms = timed(decide, 3)
+
+        mismatches = sum(a != b for a, b in zip(cached, uncached))
+        print(f"  {name:16}: {mismatches} of {len(cached)} intercepts differ, "
+              f"uncached {uncached_ms:.2f} ms, cached {cached_ms:.2f} ms, speedup {uncached_ms / cached_ms:.1f}x")
+
+
+def benchmark_background_planning():
+    """
+    Tick durations of the game loop while a worker thread plans, like BackgroundPlanner does, and without it.
+    Both threads run Python code that competes for the GIL, so the worker can make ticks slower.
+    """
+    tick_info, plan_info = GameInfo(0), GameInfo(0)
+    tick_cars, plan_cars = random_cars(2, seed=1), random_cars(20, seed=2)
+    position, velocity = INTERCEPT_SCENARIOS["lob towards car"]
+    predicted_scenario(tick_info, position, velocity)
+    predicted_scenario(plan_info, position, velocity)
+    low_balls = lambda car, ball: ball.position[2] < 300
+
+    def tick():
+        # stand-in for a maneuver step: refresh the intercepts of our car
+        Intercept.cache.clear()
+        for car in tick_cars:
+            Intercept(car, tick_info.ball_predictions, low_balls)
+
+    def plan():
+        # stand-in for choosing a maneuver: intercepts of several strikes for all cars
+        Intercept.cache.clear()
+        for car in plan_cars:
+            for backwards in (False, True):
+                Intercept(car, plan_info.ball_predictions, low_balls, backwards)
+
+    def tick_durations(ticks: int) -> np.ndarray:
+        durations = []
+        for _ in range(ticks):
+            start = time.perf_counter()
+            tick()
+            durations.append(time.perf_counter() - start)
+            time.sleep(max(1 / 120 - durations[-1], 0))
+        return np.array(durations) * 1000
+
+    print("tick durations with and without planning in a worker thread, 600 ticks")
+    planning = threading.Event()
+
+    def work():
+        while planning.is_set():
+            plan()
+
+    for worker in (False, True):
+        thread = None
+        if worker:
+            planning.set()
+            thread = threading.Thread(target=work, daemon=True)
+            thread.start()
+        durations = tick_durations(600)
+        planning.clear()
+        if thread is not None:
+            thread.join()
+        print(f"  {'with' if worker else 'without'} worker: median {np.median(durations):.2f} ms, "
+              f"99th percentile {np.percentile(durations, 99):.2f} ms, max {durations.max():.2f} ms")
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "rolling": benchmark_rolling_prediction,
+    "intercept": benchmark_intercept_search,
+    "intercept_cache": benchmark_intercept_cache,
+    "background_planning": benchmark_background_planning,
+}
+
+
+if __name__ == "__main__":
+    Game.set_mode("soccar")
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
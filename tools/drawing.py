@@ -1,10 +1,11 @@
 import math
 from typing import List
 
+import numpy as np
 from rlbot.utils.rendering.rendering_manager import RenderingManager
 
 from rlutilities.linear_algebra import vec3, cross
-from rlutilities.simulation import Ball
+from tools.ball_prediction import BallPrediction
 from tools.math import clamp
 from tools.vector_math import to_vec3
 
@@ -156,8 +157,11 @@ class DrawingTool:
             pos + vec3(-size/2, size/2, 0),
         ])
 
-    def ball_prediction(self, ball_predictions: List[Ball], time_limit: float = None):
-        points = [ball.position for ball in ball_predictions if not time_limit or ball.time < time_limit]
+    def ball_prediction(self, ball_predictions: BallPrediction, time_limit: float = None):
+        n = len(ball_predictions)
+        if time_limit:
+            n = int(np.searchsorted(ball_predictions.time[:n], time_limit))
+        points = [vec3(*position) for position in ball_predictions.position[:n]]
         self.group('prediction')
         self.color(self.yellow)
         self.polyline(points)
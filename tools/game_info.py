@@ -1,11 +1,13 @@
-from typing import List, Tuple
+from typing import List, Tuple, Optional, Callable, Dict
 
+import numpy as np
 from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket
 
 from rlutilities.simulation import Game, Car, Ball, Pad
-from rlutilities.linear_algebra import vec3, vec2, norm, normalize, cross, rotation, dot, xy
+from rlutilities.linear_algebra import vec3
 
-from tools.vector_math import distance
+from tools.ball_prediction import BallPrediction, LOCAL_RLUTILITIES, FRAMEWORK_STRUCT, SHARED_MEMORY, Resolution, \
+    uniform_resolution, resolution_times, is_rolling, roll
 
 
 class Goal:
@@ -32,7 +34,8 @@ class GameInfo(Game):
         self.my_goal = Goal(team)
         self.their_goal = Goal(1 - team)
 
-        self.ball_predictions: List[Ball] = []
+        self.ball_predictions = BallPrediction()
+        self.latest_touch_time = 0.0
         self.about_to_score = False
         self.about_to_be_scored_on = False
         self.time_of_goal = -1
@@ -40,8 +43,30 @@ class GameInfo(Game):
         self.large_boost_pads: List[Pad] = []
         self.small_boost_pads: List[Pad] = []
 
+        # lowered and raised by the agent, when ticks take too long (see TickBudget)
+        self.prediction_horizon = self.PREDICTION_HORIZON
+        self.postpone_intercept_updates = False
+
+        # car id -> (time of the search, time of the found slice), see AirToAirIntercept
+        self.air_intercept_results: Dict[int, Tuple[float, float]] = {}
+
+        # quantized car state relative to an aerial target -> distance from it at the end, see AerialStrike
+        self.flight_errors: Dict[Tuple, float] = {}
+
+        self.prediction_source = LOCAL_RLUTILITIES
+        self.prediction_resolution: Resolution = uniform_resolution(1 / 120)
+        self._get_ball_prediction_struct: Optional[Callable] = None
+        self._shared_prediction: Optional["SharedPrediction"] = None
+
+        # state the current ball prediction was made from, used to decide whether it can be reused
+        self._prediction_source: Optional[str] = None
+        self._prediction_resolution: Optional[Resolution] = None
+        self._prediction_time = -1.0
+        self._prediction_touch_time = 0.0
+
     def read_packet(self, packet: GameTickPacket, field_info: FieldInfoPacket):
         self.read_game_information(packet, field_info)
+        self.latest_touch_time = packet.game_ball.latest_touch.time_seconds
         self.large_boost_pads = self._get_large_boost_pads(field_info)
         self.small_boost_pads = self._get_small_boost_pads(field_info)
 
@@ -57,6 +82,26 @@ class GameInfo(Game):
     def _get_small_boost_pads(self, field_info: FieldInfoPacket) -> List[Pad]:
         return [self.pads[i] for i in range(field_info.num_boosts) if not field_info.boost_pads[i].is_full_boost]
 
+    def set_prediction_source(self, source: str, get_ball_prediction_struct: Callable = None,
+                              shared_prediction: "SharedPrediction" = None):
+        """
+        Choose whether `predict_ball` simulates the ball locally with RLUtilities (LOCAL_RLUTILITIES),
+        reads the prediction the framework computes every tick (FRAMEWORK_STRUCT),
+        or uses the one a teammate's process publishes (SHARED_MEMORY).
+        The framework prediction needs the agent's `get_ball_prediction_struct` method,
+        and the shared one a `shared_prediction` to read from. When nothing recent was published,
+        the ball is simulated locally.
+        """
+        assert source in (LOCAL_RLUTILITIES, FRAMEWORK_STRUCT, SHARED_MEMORY), f"Unknown prediction source: {source}"
+        assert source != FRAMEWORK_STRUCT or get_ball_prediction_struct is not None, \
+            "Reading the framework prediction requires get_ball_prediction_struct"
+        assert source != SHARED_MEMORY or shared_prediction is not None, \
+            "Reading the shared prediction requires shared_prediction"
+
+        self.prediction_source = source
+        self._get_ball_prediction_struct = get_ball_prediction_struct
+        self._shared_prediction = shared_prediction
+
     def get_teammates(self, car: Car) -> List[Car]:
         return [self.cars[i] for i in range(self.num_cars)
                 if self.cars[i].team == self.team and self.cars[i].id != car.id]
@@ -64,44 +109,235 @@ class GameInfo(Game):
     def get_opponents(self, car: Car) -> List[Car]:
         return [self.cars[i] for i in range(self.num_cars) if self.cars[i].team != car.team]
 
-    def predict_ball(self, time_limit=6.0, dt=1/120):
+    PREDICTION_HORIZON = 6.0
+    SHORT_PREDICTION_HORIZON = 3.0
+
+    # maximum difference between the live ball and its predicted slice, for the prediction to be reused
+    PREDICTION_POSITION_TOLERANCE = 10
+    PREDICTION_VELOCITY_TOLERANCE = 30
+
+    # how much closer coarse slices of a reused prediction may get, before the tail is simulated again
+    # without it, every tick would re-simulate everything after the first resolution change
+    PREDICTION_RESOLUTION_SLACK = 0.5
+
+    # predict resting and rolling balls with a closed-form model, instead of simulating them
+    ANALYTIC_ROLLING = True
+
+    def predict_ball(self, time_limit: float = None, dt: float = None, resolution: Resolution = None):
+        """
+        Make sure the shared prediction covers at least `time_limit` seconds (`prediction_horizon` by default)
+        into the future, with slices `dt` seconds apart, or spaced according to a `resolution` schedule
+        (see MULTI_RESOLUTION).
+        If neither is given, `prediction_resolution` is used.
+
+        The prediction is never cut short, so other callers in the same tick keep what they asked for,
+        except when `prediction_horizon` is lowered below PREDICTION_HORIZON and no `time_limit` is given:
+        then the slices beyond the horizon are dropped, so that the searches over them get shorter too.
+        If it already covers the requested time in this tick, nothing is done. If the ball is still following
+        the previous prediction, only the elapsed slices are dropped and the tail is extended.
+        The ball is simulated from scratch only after a touch or a divergence.
+        With the FRAMEWORK_STRUCT prediction source, the framework's prediction is copied once per tick instead
+        and thinned out to the requested resolution.
+
+        Whenever existing slices change, `ball_predictions.version` is incremented.
+        """
+        shorten = time_limit is None and self.prediction_horizon < self.PREDICTION_HORIZON
+        if time_limit is None:
+            time_limit = self.prediction_horizon
+        if resolution is None:
+            resolution = self.prediction_resolution if dt is None else uniform_resolution(dt)
+
+        if self._prediction_covers(time_limit, resolution):
+            if shorten:
+                self._drop_slices_after(time_limit)
+            return
+
+        source = self.prediction_source
+        if source == SHARED_MEMORY and not self._shared_prediction.read(self):
+            source = LOCAL_RLUTILITIES
+
+        if source == FRAMEWORK_STRUCT:
+            self._read_framework_prediction(resolution)
+        elif source == LOCAL_RLUTILITIES:
+            self._simulate_ball_prediction(time_limit, resolution)
+
+        self._prediction_source = source
+        self._prediction_resolution = resolution
+        self._prediction_time = self.ball.time
+        if shorten:
+            self._drop_slices_after(time_limit)
+
         self.about_to_score = False
         self.about_to_be_scored_on = False
         self.time_of_goal = -1
+        self._detect_goal()
+
+    def _drop_slices_after(self, time_limit: float):
+        """Keep the slices up to the first one at least `time_limit` ahead, so the prediction still covers it."""
+        predictions = self.ball_predictions
+        end = np.searchsorted(predictions.time[:len(predictions)], self.ball.time + time_limit)
+        predictions.truncate(int(end) + 1)
+
+    def _prediction_covers(self, time_limit: float, resolution: Resolution) -> bool:
+        """Whether the prediction was already updated this tick and reaches far enough."""
+        predictions = self.ball_predictions
+        if (
+            self._prediction_time != self.ball.time
+            or self._prediction_source != self.prediction_source
+            or self._prediction_resolution != resolution
+        ):
+            return False
+
+        # the framework and shared predictions are as long as they get,
+        # and the shared one is only used while the publisher hasn't started overwriting it
+        if self.prediction_source == SHARED_MEMORY:
+            return self._shared_prediction.valid()
+        if self.prediction_source == FRAMEWORK_STRUCT:
+            return True
+
+        return bool(predictions) and predictions.time[len(predictions) - 1] >= self.ball.time + time_limit
+
+    def _simulate_ball_prediction(self, time_limit: float, resolution: Resolution):
+        predictions = self.ball_predictions
+        elapsed = self._elapsed_prediction_slices(resolution)
 
-        self.ball_predictions = []
-        prediction = Ball(self.ball)
+        if elapsed is None:
+            predictions.clear()
+            self._prediction_touch_time = self.latest_touch_time
+        else:
+            predictions.drop_prefix(elapsed)
+            # slices that were far ahead might be too coarse now
+            violation = predictions.first_violation(resolution, self.ball.time, self.PREDICTION_RESOLUTION_SLACK)
+            predictions.truncate(violation)
 
-        while prediction.time < self.ball.time + time_limit:
-            prediction.step(dt)
-            self.ball_predictions.append(Ball(prediction))
+        prediction = Ball(predictions[-1]) if predictions else Ball(self.ball)
+        end_time = self.ball.time + time_limit
 
-            if self.time_of_goal == -1:
-                if self.my_goal.inside(prediction.position):
-                    self.about_to_be_scored_on = True
-                    self.time_of_goal = prediction.time
-                if self.their_goal.inside(prediction.position):
-                    self.about_to_score = True
-                    self.time_of_goal = prediction.time
+        # fast path, continue with the simulation once the ball gets near a wall
+        if self.ANALYTIC_ROLLING and is_rolling(prediction):
+            times = resolution_times(resolution, self.ball.time, prediction.time, end_time)
+            predictions.extend(times, *roll(prediction, times))
+            prediction = Ball(predictions[-1]) if predictions else prediction
+
+        for segment_end, dt in resolution:
+            segment_end = min(self.ball.time + segment_end, end_time)
+            while prediction.time < segment_end:
+                prediction.step(dt)
+                predictions.append(prediction)
+
+    def _read_framework_prediction(self, resolution: Resolution):
+        predictions = self.ball_predictions
+        predictions.read_struct(self._get_ball_prediction_struct())
+
+        # drop slices that aren't in the future
+        n = len(predictions)
+        predictions.drop_prefix(int(np.searchsorted(predictions.time[:n], self.ball.time, side="right")))
+        predictions.resample(resolution, self.ball.time)
+
+    def _elapsed_prediction_slices(self, resolution: Resolution) -> Optional[int]:
+        """
+        Returns how many slices of the current local prediction have already elapsed,
+        or None if the prediction can't be reused because the ball has been touched or diverged from it.
+        """
+        predictions = self.ball_predictions
+        n = len(predictions)
+        if (
+            n == 0
+            or self._prediction_source != LOCAL_RLUTILITIES
+            or resolution != self._prediction_resolution
+            or self.latest_touch_time != self._prediction_touch_time
+        ):
+            return None
+
+        # the prediction is just being extended in the same tick
+        if self._prediction_time == self.ball.time:
+            return 0
+
+        # find the slice predicted for the current time
+        dt = resolution[0][1]
+        i = int(np.searchsorted(predictions.time[:n], self.ball.time - dt / 2))
+        if i == n or abs(predictions.time[i] - self.ball.time) > dt / 2:
+            return None
+
+        position, velocity = self.ball.position, self.ball.velocity
+        position_error = np.linalg.norm(predictions.position[i] - (position[0], position[1], position[2]))
+        velocity_error = np.linalg.norm(predictions.velocity[i] - (velocity[0], velocity[1], velocity[2]))
+        if (
+            position_error > self.PREDICTION_POSITION_TOLERANCE
+            or velocity_error > self.PREDICTION_VELOCITY_TOLERANCE
+        ):
+            return None
+
+        # the slice for the current time has elapsed as well
+        return i + 1
+
+    def next_ground_contact(self, height: float) -> Optional[Ball]:
+        """
+        First predicted slice where the ball comes down to `height` or lower, shared by all callers in a tick.
+        None if the prediction doesn't get there, or if it's stale: it wasn't made in this tick and the ball
+        has been touched since, or has diverged from it.
+        """
+        predictions = self.ball_predictions
+        if self._prediction_time == self.ball.time:
+            start = 0
+        else:
+            start = self._elapsed_prediction_slices(self._prediction_resolution)
+            if start is None:
+                return None
+
+        contacts = predictions.events.ground_contacts(height)
+        i = int(np.searchsorted(contacts, start))
+        return predictions[int(contacts[i])] if i < len(contacts) else None
+
+    def _detect_goal(self):
+        crossings = self.ball_predictions.events.goal_line_crossings
+        if len(crossings):
+            i = crossings[0]
+            if self.my_goal.inside(self.ball_predictions.position[i]):
+                self.about_to_be_scored_on = True
+            else:
+                self.about_to_score = True
+            self.time_of_goal = self.ball_predictions.time[i]
 
     def predict_car_drive(self, index, time_limit=2.0, dt=1/60) -> List[vec3]:
         """Simple prediction of a driving car assuming no acceleration."""
-        car = self.cars[index]
+        path = self.predict_drive_paths([self.cars[index]], time_limit, dt)[0]
+        return [vec3(*position) for position in path]
+
+    @staticmethod
+    def predict_drive_paths(cars: List[Car], time_limit=2.0, dt=1/60) -> np.ndarray:
+        """
+        Paths of driving cars assuming no acceleration, as a (cars x steps x 3) array of positions.
+        Cars on the ground that are turning follow a circle, the others a straight line.
+        """
         time_steps = int(time_limit / dt)
-        speed = norm(car.velocity)
-        ang_vel_z = car.angular_velocity[2]
+        times = dt * np.arange(time_steps)
+        positions = np.array([[car.position[0], car.position[1], car.position[2]] for car in cars]).reshape(-1, 3)
+        velocities = np.array([[car.velocity[0], car.velocity[1], car.velocity[2]] for car in cars]).reshape(-1, 3)
+        yaw_rates = np.array([car.angular_velocity[2] for car in cars])
+        on_ground = np.array([car.on_ground for car in cars], dtype=bool)
+
+        # predict straight paths
+        paths = positions[:, np.newaxis] + velocities[:, np.newaxis] * times[:, np.newaxis]
+
+        # predict circular paths, rotating the offset from the centre of the circle
+        turning = on_ground & (yaw_rates != 0)
+        if np.any(turning):
+            position, velocity, yaw_rate = positions[turning], velocities[turning], yaw_rates[turning]
+            radius = np.linalg.norm(velocity, axis=1) / yaw_rate
+            heading = velocity[:, :2] / np.maximum(np.linalg.norm(velocity[:, :2], axis=1), 1e-9)[:, np.newaxis]
+            offset = np.stack([heading[:, 1], -heading[:, 0]], axis=1) * radius[:, np.newaxis]
+            centre = position[:, :2] - offset
 
-        # predict circular path
-        if ang_vel_z != 0 and car.on_ground:
-            radius = speed / ang_vel_z
-            centre = car.position - cross(normalize(xy(car.velocity)), vec3(0, 0, 1)) * radius
-            centre_to_car = vec2(car.position - centre)
-            return [
-                vec3(dot(rotation(ang_vel_z * dt * i), centre_to_car)) + centre
-                    for i in range(time_steps)]
+            angles = yaw_rate[:, np.newaxis] * times
+            cos, sin = np.cos(angles), np.sin(angles)
+            circles = np.empty((len(position), time_steps, 3))
+            circles[:, :, 0] = cos * offset[:, 0:1] - sin * offset[:, 1:2] + centre[:, 0:1]
+            circles[:, :, 1] = sin * offset[:, 0:1] + cos * offset[:, 1:2] + centre[:, 1:2]
+            circles[:, :, 2] = position[:, 2:3]
+            paths[turning] = circles
 
-        # predict straight path
-        return [car.position + car.velocity * dt * i for i in range(time_steps)]
+        return paths
 
     COLLISION_THRESHOLD = 150
 
@@ -109,19 +345,23 @@ class GameInfo(Game):
         """Returns a list of tuples, where the first two elements are
         indices of cars and the last is time from now until the collision.
         """
-        time_steps = int(time_limit / dt)
-        predictions = [self.predict_car_drive(i, time_limit=time_limit, dt=dt) for i in range(self.num_cars)]
-        collisions = []
-        for i in range(self.num_cars):
-            for j in range(self.num_cars):
-                if i >= j: 
-                    continue
-
-                for step in range(time_steps):
-                    pos1 = predictions[i][step]
-                    pos2 = predictions[j][step]
-                    if distance(pos1, pos2) < self.COLLISION_THRESHOLD:
-                        collisions.append((i, j, step * dt))
-                        break
-        
-        return collisions
+        if self.num_cars < 2 or int(time_limit / dt) == 0:
+            return []
+
+        paths = self.predict_drive_paths([self.cars[i] for i in range(self.num_cars)], time_limit, dt)
+        first, second = np.triu_indices(self.num_cars, k=1)
+
+        # skip pairs of cars which stay too far from each other, each car stays within a circle around its start
+        starts = paths[:, 0]
+        radii = np.max(np.linalg.norm(paths - starts[:, np.newaxis], axis=2), axis=1)
+        gaps = np.linalg.norm(starts[first] - starts[second], axis=1)
+        near = gaps < radii[first] + radii[second] + self.COLLISION_THRESHOLD
+        first, second = first[near], second[near]
+
+        # first step where the remaining pairs are close
+        close = np.linalg.norm(paths[first] - paths[second], axis=2) < self.COLLISION_THRESHOLD
+        steps = np.argmax(close, axis=1)
+        collides = close[np.arange(len(first)), steps]
+
+        return [(int(i), int(j), int(step) * dt)
+                for i, j, step in zip(first[collides], second[collides], steps[collides])]
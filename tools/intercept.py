@@ -1,49 +1,227 @@
 import math
-from typing import Optional, List
+import threading
+from typing import Optional, Tuple, List, Callable, Dict, Hashable
+
+import numpy as np
 
 from rlutilities.linear_algebra import norm, angle_between, dot
 from rlutilities.mechanics import Aerial
 from rlutilities.simulation import Car, Ball
+from tools.ball_prediction import BallPrediction
 from tools.math import clamp
+from tools.predicates import Predicate
+from tools.reach_table import ReachTable
+from tools.search import bracket_first_positive, sample_first_true_from_hint
 
 from tools.vector_math import distance, direction, ground
 
 
 class Intercept:
-    def __init__(self, car: Car, ball_predictions, predicate: callable = None, backwards=False):
-        self.ball: Optional[Ball] = None
-        self.car: Car = car
-        self.is_viable = True
+    """
+    Find the first reachable ball slice that also meets the predicate.
+    A `Predicate` (see tools/predicates.py) is evaluated for all slices at once, before the search,
+    so that the slices it rejects are skipped without testing whether they're reachable.
+
+    The BRACKETING search finds the first reachable slice without testing every slice before it,
+    see `bracket_first_positive`. The predicate is still tested in order from there.
+    It assumes that slices don't become unreachable again after they became reachable, which isn't always true,
+    e.g. for a ball that bounces away. Then it can miss a short reachable window, so it's opt-in.
+
+    Reach times and results are memoized in `cache` (see InterceptCache), so that intercepts of the same car
+    over the same prediction only differ in the predicates they test.
+    """
+
+    LINEAR = "linear"
+    BRACKETING = "bracketing"
+    SEARCH = LINEAR
+
+    # number of candidate slices between the coarse samples of the bracketing search
+    BRACKET_STRIDE = 8
+
+    # set to None to disable memoization
+    cache: Optional["InterceptCache"] = None
 
-        # find the first reachable ball slice that also meets the predicate
-        speed = 1000 if backwards else estimate_max_car_speed(car)
+    def __init__(self, car: Car, ball_predictions: BallPrediction, predicate: callable = None, backwards=False,
+                 search: str = None):
+        search = search or self.SEARCH
+        cache = self.cache
+        slacks = None
+        if cache is not None:
+            result_key = (predicate, backwards, search)
+            cached_result = cache.result(car, ball_predictions, result_key)
+            if cached_result is not None:
+                self._use_slice(car, ball_predictions, cached_result[0])
+                return
+            slacks = cache.slacks(car, ball_predictions, backwards)
 
-        for i in range(0, len(ball_predictions)):
-            ball = ball_predictions[i]
-            time = estimate_time(car, ball.position, speed, -1 if backwards else 1)
-            if time < ball.time - car.time and (predicate is None or predicate(car, ball)):
-                self.ball = ball
+        speed = 1000 if backwards else None
+        dd = -1 if backwards else 1
+
+        candidates = range(0, len(ball_predictions))
+        if isinstance(predicate, Predicate):
+            candidates = np.flatnonzero(predicate.mask(car, ball_predictions))
+            predicate = None
+
+        # read the slices straight from the prediction arrays, balls are only created for the predicate
+        times = ball_predictions.time
+
+        def slack(k: int) -> float:
+            """How much sooner than the ball the car can get to the k-th candidate, positive if reachable."""
+            i = candidates[k]
+            if slacks is not None and not math.isnan(slacks[i]):
+                return slacks[i]
+            value = times[i] - car.time - estimate_time(car, ball_predictions.position_at(i), speed, dd)
+            if slacks is not None:
+                slacks[i] = value
+            return value
+
+        start = 0
+        if search == self.BRACKETING:
+            start = bracket_first_positive(slack, len(candidates), self.BRACKET_STRIDE)
+
+        index = None
+        for k in range(start, len(candidates)):
+            i = candidates[k]
+            if slack(k) > 0 and (predicate is None or predicate(car, ball_predictions[i])):
+                index = i
                 break
 
+        if cache is not None:
+            cache.store_result(car, ball_predictions, result_key, index)
+        self._use_slice(car, ball_predictions, index)
+
+    @classmethod
+    def from_slice(cls, car: Car, ball_predictions: BallPrediction, index: Optional[int]) -> "Intercept":
+        """Create an intercept for a slice that has already been found, or a non-viable one if index is None."""
+        intercept = cls.__new__(cls)
+        intercept._use_slice(car, ball_predictions, index)
+        return intercept
+
+    def _use_slice(self, car: Car, ball_predictions: BallPrediction, index: Optional[int]):
+        self.car: Car = car
+        self.is_viable = index is not None
+        self.prediction_version = ball_predictions.version
+
+        if index is not None:
+            self.ball: Ball = ball_predictions[index]
+
         # if no slice is found, use the last one
-        if self.ball is None:
-            if not ball_predictions:
-                self.ball = Ball()
-                self.ball.time = math.inf
-            else:
-                self.ball = ball_predictions[-1]
-            self.is_viable = False
+        elif not ball_predictions:
+            self.ball = Ball()
+            self.ball.time = math.inf
+        else:
+            self.ball = ball_predictions[-1]
 
         self.time = self.ball.time
         self.ground_pos = ground(self.ball.position)
         self.position = self.ball.position
 
 
+class InterceptCache(threading.local):
+    """
+    Memoizes intercept searches over one ball prediction. Each thread has its own entries.
+    For each car and direction, it keeps how much sooner than the ball the car can get to each slice,
+    filled in lazily as searches test slices, and the slice each (predicate, backwards, ...) search found.
+    Everything is dropped as soon as the prediction changes. Cars are told apart by their state,
+    because the car objects themselves are recreated every tick.
+    """
+    def __init__(self):
+        self._prediction_key = None
+        self._slacks: Dict[Hashable, np.ndarray] = {}
+        self._results: Dict[Hashable, Optional[int]] = {}
+
+    def slacks(self, car: Car, ball_predictions: BallPrediction, backwards: bool) -> np.ndarray:
+        """Per-slice reach slack of the car, NaN where it hasn't been computed yet. Meant to be written to."""
+        self._validate(ball_predictions)
+        key = (self._car_key(car), backwards)
+        if key not in self._slacks:
+            self._slacks[key] = np.full(len(ball_predictions), math.nan)
+        return self._slacks[key]
+
+    def result(self, car: Car, ball_predictions: BallPrediction, key: Hashable) -> Optional[Tuple[Optional[int]]]:
+        """The memoized slice index of a search wrapped in a tuple, or None if the search hasn't been done."""
+        self._validate(ball_predictions)
+        key = (self._car_key(car), key)
+        return (self._results[key],) if key in self._results else None
+
+    def store_result(self, car: Car, ball_predictions: BallPrediction, key: Hashable, index: Optional[int]):
+        self._validate(ball_predictions)
+        self._results[(self._car_key(car), key)] = index
+
+    def clear(self):
+        self._prediction_key = None
+        self._slacks.clear()
+        self._results.clear()
+
+    def _validate(self, ball_predictions: BallPrediction):
+        # slices can be appended without changing the version, then later slices haven't been searched yet
+        prediction_key = (id(ball_predictions), ball_predictions.version, len(ball_predictions))
+        if prediction_key != self._prediction_key:
+            self.clear()
+            self._prediction_key = prediction_key
+
+    @staticmethod
+    def _car_key(car: Car) -> Hashable:
+        position, velocity, forward = car.position, car.velocity, car.forward()
+        return (car.id, car.time, car.boost, position[0], position[1], position[2],
+                velocity[0], velocity[1], velocity[2], forward[0], forward[1], forward[2])
+
+
+Intercept.cache = InterceptCache()
+
+
+def batch_intercepts(cars: List[Car], ball_predictions: BallPrediction, predicate: callable = None,
+                     predicate_mask: np.ndarray = None, backwards=False) -> List[Intercept]:
+    """
+    Find intercepts for many cars against one prediction, like creating an `Intercept` for each of them,
+    but with the reach times of all cars and slices computed at once.
+    `predicate_mask` is a boolean array over slices (or cars x slices) that rules slices out before `predicate`
+    is tested, a predicate function is then called only for reachable slices, in order.
+    """
+    if not cars:
+        return []
+
+    n = len(ball_predictions)
+    reachable = reach_times(cars, ball_predictions, backwards) < (
+        ball_predictions.time[:n] - np.array([[car.time] for car in cars]))
+    if predicate_mask is not None:
+        reachable &= predicate_mask
+    if isinstance(predicate, Predicate):
+        reachable &= np.array([predicate.mask(car, ball_predictions) for car in cars])
+        predicate = None
+
+    intercepts = []
+    for car, car_reachable in zip(cars, reachable):
+        index = None
+        for i in np.flatnonzero(car_reachable):
+            if predicate is None or predicate(car, ball_predictions[i]):
+                index = i
+                break
+        intercepts.append(Intercept.from_slice(car, ball_predictions, index))
+    return intercepts
+
+
+# simulated reach times, used instead of the heuristic for driving forwards as fast as possible,
+# once tools/reach_table.py has been run
+REACH_TABLE: Optional[ReachTable] = ReachTable.load()
+
+
 def estimate_max_car_speed(car: Car):
     return clamp(max(norm(car.velocity), 1300) + car.boost * 100, 1600, 2300)
 
 
-def estimate_time(car: Car, target, speed, dd=1) -> float:
+def estimate_time(car: Car, target, speed=None, dd=1) -> float:
+    """
+    Time for the car to drive to the target at `speed`, or forwards as fast as it can if `speed` is None.
+    Only the latter is looked up in the reach table, when it's loaded. An explicit speed always uses the heuristic,
+    so estimates that are compared with each other should either all pass a speed or none.
+    """
+    if speed is None:
+        assert dd == 1, "Pass the speed to estimate driving backwards"
+        if REACH_TABLE is not None:
+            return REACH_TABLE.car_time(car, target)
+        speed = estimate_max_car_speed(car)
+
     travel = distance(car, target) / speed
     turning = angle_between(car.forward() * dd, direction(car, target)) / math.pi * 2
     if turning < 1:
@@ -52,29 +230,110 @@ def estimate_time(car: Car, target, speed, dd=1) -> float:
     return travel + acceleration + turning * 0.7
 
 
+def estimate_times(cars: List[Car], targets: np.ndarray, speeds: np.ndarray = None, dd=1) -> np.ndarray:
+    """Vectorized `estimate_time` of every car to every target, returns an (n_cars x n_targets) array."""
+    if speeds is None:
+        assert dd == 1, "Pass the speeds to estimate driving backwards"
+        if REACH_TABLE is not None:
+            return REACH_TABLE.car_times(cars, targets)
+        speeds = np.array([estimate_max_car_speed(car) for car in cars], dtype=float)
+
+    positions = np.array([[car.position[0], car.position[1], car.position[2]] for car in cars])
+    velocities = np.array([[car.velocity[0], car.velocity[1], car.velocity[2]] for car in cars])
+    forwards = np.array([[f[0], f[1], f[2]] for f in (car.forward() for car in cars)]) * dd
+    boosts = np.array([car.boost for car in cars])
+
+    to_targets = targets[np.newaxis, :, :] - positions[:, np.newaxis, :]
+    distances = np.linalg.norm(to_targets, axis=2)
+    travel = distances / speeds[:, np.newaxis]
+
+    cos_angles = np.einsum("ntk,nk->nt", to_targets, forwards) / np.maximum(distances, 1e-9)
+    turning = np.arccos(np.clip(cos_angles, -1, 1)) / math.pi * 2
+    turning = np.where(turning < 1, turning ** 2, turning)
+
+    forward_speeds = np.einsum("nk,nk->n", velocities, forwards) * dd
+    acceleration = (speeds * dd - forward_speeds) / 2100 * 0.2 * dd / np.maximum(boosts / 20, 1)
+    return travel + acceleration[:, np.newaxis] + turning * 0.7
+
+
+def reach_times(cars: List[Car], ball_predictions: BallPrediction, backwards=False) -> np.ndarray:
+    """
+    Estimated time for each car to reach each slice of the prediction, as an (n_cars x n_slices) array.
+    Forward reach times that were published along with a shared prediction are used if all cars have them.
+    """
+    if not backwards and ball_predictions.known_reach_times:
+        rows = [ball_predictions.known_reach_times.get((car.id, car.time)) for car in cars]
+        if all(row is not None for row in rows):
+            return np.array(rows)
+
+    speeds = np.full(len(cars), 1000.0) if backwards else None
+    positions = ball_predictions.position[:len(ball_predictions)]
+    return estimate_times(cars, positions, speeds, -1 if backwards else 1)
+
+
 class AirToAirIntercept:
-    def __init__(self, car: Car, ball_predictions: List[Ball]):
+    """
+    Find the first ball slice that can be reached by continuing an aerial.
+    Only slices up to `time_limit` seconds ahead are tested, because the shared prediction might be longer.
+
+    Every STRIDE-th slice is tested first, and the first viable window is refined slice by slice,
+    so a window of viable slices shorter than STRIDE can be missed. Pass `previous_results`
+    (GameInfo.air_intercept_results) to remember the result of each car: the next search also tests that slice,
+    so a short window found before isn't lost between the samples. Earlier slices are always searched.
+    """
+
+    STRIDE = 6
+
+    # how long the previous result of a car is tested again
+    WARM_START_DURATION = 1.0
+
+    def __init__(self, car: Car, ball_predictions: BallPrediction, time_limit: float = math.inf,
+                 previous_results: Dict[int, Tuple[float, float]] = None):
         self.car: Car = car
         self.ball: Ball = None
         self.is_viable = True
 
+        n = len(ball_predictions)
+        n = min(int(np.searchsorted(ball_predictions.time[:n], car.time + time_limit)) + 1, n)
+
         test_aerial = Aerial(car)
-        for i in range(0, len(ball_predictions)):
-            ball_slice = ball_predictions[i]
-            test_aerial.target = ball_slice.position
-            test_aerial.arrival_time = ball_slice.time
-            if test_aerial.is_viable():
-                self.ball = ball_slice
-                break
+
+        def viable(i: int) -> bool:
+            test_aerial.target = ball_predictions.position_at(i)
+            test_aerial.arrival_time = ball_predictions.time[i]
+            return test_aerial.is_viable()
+
+        hint = None if previous_results is None else self._warm_start(car, ball_predictions, n, previous_results)
+        index = sample_first_true_from_hint(viable, n, self.STRIDE, hint)
+
+        if index is not None:
+            self.ball = ball_predictions[index]
+            if previous_results is not None:
+                previous_results[car.id] = car.time, self.ball.time
 
         # if no slice is found, use the last one
-        if self.ball is None:
-            if not ball_predictions:
+        else:
+            if n == 0:
                 self.ball = Ball()
                 self.ball.time = math.inf
             else:
-                self.ball = ball_predictions[-1]
+                self.ball = ball_predictions[n - 1]
             self.is_viable = False
+            if previous_results is not None:
+                previous_results.pop(car.id, None)
 
         self.time = self.ball.time
         self.position = self.ball.position
+
+    @classmethod
+    def _warm_start(cls, car: Car, ball_predictions: BallPrediction, n: int,
+                    previous_results: Dict[int, Tuple[float, float]]) -> Optional[int]:
+        """Slice at the time of the previous result of this car, if there's a recent one within the searched slices."""
+        if car.id not in previous_results:
+            return None
+        search_time, intercept_time = previous_results[car.id]
+        if not search_time <= car.time < min(intercept_time, search_time + cls.WARM_START_DURATION):
+            return None
+
+        i = int(np.searchsorted(ball_predictions.time[:n], intercept_time))
+        return i if i < n else None
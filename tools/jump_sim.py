@@ -1,120 +1,184 @@
-# TODO Replace with imports from RLU instead
-class vec3:
-    def __init__(self, x: float, y: float, z: float):
-        self.data = (x, y, z)
-    def __getitem__(self, index):
-        return self.data[index]
-    def __add__(self, other):
-        return vec3(self[0] + other[0], self[1] + other[1], self[2] + other[2])
-    def __mul__(self, num):
-        return vec3(self[0] * num, self[1] * num, self[2] * num)
-
-class Orientation:
-    def __init__(self, forward: vec3, left: vec3, up: vec3):
-        self.forward = forward
-        self.left = left
-        self.up = up
-
-def linspace(start, end, n):
-    diff = end - start
-    step = diff / n
-    return [start + step * i for i in range(n)]
-
-# Constants
-GRAVITY = vec3(0.0, 0.0, -650.0)
-MAX_FIRST_HOLD_DURATION = 0.2
-MAX_JUMP_DURATION = 1.25
-SINGLE_TICK_ACC = 291.667
-FIRST_JUMP_ACC = 1458.333374
-
-class JumpSim:
-    def __init__(self, position, velocity, orientation, first_hold_duration, second_jump_time):
-        self.position = position
-        self.velocity = velocity
-        self.orientation = orientation
-
-        assert 0.0 < first_hold_duration <= MAX_FIRST_HOLD_DURATION
-        assert first_hold_duration < second_jump_time # <= first_hold_duration + MAX_JUMP_DURATION
-        self.first_hold_duration =first_hold_duration
-        self.second_jump_time = second_jump_time
-
-        self.jumped_twice = False
-        self.timer = 0.0
-        self.done = False
-
-    def step(self, dt):
-        if self.timer == 0.0:
-            self.velocity += self.orientation.up * SINGLE_TICK_ACC
-        elif self.timer <= self.first_hold_duration:
-            self.velocity += self.orientation.up * FIRST_JUMP_ACC * dt
-        elif not self.jumped_twice and self.timer >= self.second_jump_time:
-            self.velocity += self.orientation.up * SINGLE_TICK_ACC
-            self.jumped_twice = True
-
-        self.velocity += GRAVITY * dt
-        self.position += self.velocity * dt
-
-        if self.position[2] <= 0.0 or self.timer > 10.0:
-            self.done = True
-
-        self.timer += dt
+"""
+Vertical motion of a car jumping off the ground, simulated with NumPy for many jumps at once,
+and inverse tables built from it, which strikes query to time their jumps:
+
+- the time a single or double jump takes to rise by a given height, and the highest point it reaches,
+- the shortest first jump hold that gets the car to a given height at a given time.
+
+Jumps are simulated for a range of initial vertical speeds and up vector orientations, so the tables
+also cover cars that jump while driving up a ramp or a wall, or off a sloped part of the field.
+The tables take a few milliseconds to build, so this is done when the module is imported.
+Plot some of the simulated jumps with:
+
+    python -m tools.jump_sim
+"""
+
+import numpy as np
+
+from tools.math import interpolate
+
+GRAVITY = -650.0
+JUMP_IMPULSE = 291.667
+HOLD_ACCELERATION = 1458.333374
+MAX_HOLD_DURATION = 0.2
+
+SIMULATION_DT = 1 / 120
+SIMULATION_TIME = 2.0
+
+# DoubleJumpStrike releases jump for two ticks between the jumps
+SECOND_JUMP_DELAY = 3 * SIMULATION_DT
+
+HEIGHTS = np.arange(0, 701, 10, dtype=np.float64)
+TIMES = np.arange(0, 1.501, 0.025)
+HOLDS = np.arange(25) * SIMULATION_DT
+VERTICAL_SPEEDS = np.array([-500, -250, 0, 250, 500, 1000], dtype=np.float64)
+UP_COMPONENTS = np.array([0.5, 0.7, 0.85, 1.0])  # vertical component of the car's up vector, 1 on flat ground
+
+# hold duration for heights that can't be reached at a given time
+UNREACHABLE = 1.0
+
+
+def simulate_heights(holds, second_jump_times, vertical_speeds, up_components,
+                     duration: float = SIMULATION_TIME, dt: float = SIMULATION_DT) -> np.ndarray:
+    """
+    Heights relative to the takeoff of jumps held for `holds` seconds, with a second jump at `second_jump_times`
+    (inf for single jumps). The arguments are broadcast against each other, the result has an additional
+    last axis for time, with the height after each tick, starting with 0 at `np.arange(steps + 1) * dt`.
+    """
+    holds, second_jump_times, vertical_speeds, up_components = [
+        x[..., None] for x in np.broadcast_arrays(*[np.asarray(x, dtype=np.float64) for x in
+                                                    (holds, second_jump_times, vertical_speeds, up_components)])
+    ]
+    steps = int(round(duration / dt))
+    timers = np.arange(steps) * dt
+
+    # same order of events as in the game: the first jump, holding it, and the second jump after releasing it
+    first_jump = timers == 0
+    holding = ~first_jump & (timers <= holds + 1e-9)
+    can_jump_again = ~first_jump & ~holding & (timers >= second_jump_times - 1e-9)
+    second_jump = can_jump_again & (np.cumsum(can_jump_again, axis=-1) == 1)
+
+    accelerations = (first_jump + second_jump) * JUMP_IMPULSE + holding * HOLD_ACCELERATION * dt
+    velocities = vertical_speeds + np.cumsum(accelerations * up_components + GRAVITY * dt, axis=-1)
+    heights = np.cumsum(velocities, axis=-1) * dt
+    return np.concatenate([np.zeros(heights.shape[:-1] + (1,)), heights], axis=-1)
+
+
+def time_to_height(heights: np.ndarray, targets: np.ndarray, dt: float = SIMULATION_DT) -> np.ndarray:
+    """
+    Earliest time at which each of the simulated jumps in `heights` (see `simulate_heights`) rises by each of
+    the `targets`, as (..., targets). Infinite when the jump doesn't get that high.
+    """
+    reached = heights[..., None, :] >= targets[:, None]
+    after = np.argmax(reached, axis=-1)
+    before = np.maximum(after - 1, 0)
+
+    height_after = np.take_along_axis(heights[..., None, :], after[..., None], axis=-1)[..., 0]
+    height_before = np.take_along_axis(heights[..., None, :], before[..., None], axis=-1)[..., 0]
+    fraction = np.clip((targets - height_before) / np.maximum(height_after - height_before, 1e-9), 0, 1)
+    times = (before + np.where(after > 0, fraction, 0)) * dt
+    return np.where(reached.any(axis=-1), times, np.inf)
+
+
+def shortest_holds(heights: np.ndarray, holds: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Shortest hold duration reaching each of the targets, where `heights` are the heights of jumps held for `holds`
+    at some time, along the first axis. Holding longer never makes the car lower, so they increase along it.
+    UNREACHABLE when even the longest hold doesn't get high enough.
+    """
+    shape = heights.shape[1:]
+    heights = heights.reshape(len(holds), -1)
+
+    below = heights[:, :, None] < targets
+    after = np.minimum(np.sum(below, axis=0), len(holds) - 1)
+    before = np.maximum(after - 1, 0)
+
+    columns = np.arange(heights.shape[1])[:, None]
+    height_after, height_before = heights[after, columns], heights[before, columns]
+    fraction = np.clip((targets - height_before) / np.maximum(height_after - height_before, 1e-9), 0, 1)
+    result = np.where(after > 0, holds[before] + fraction * (holds[after] - holds[before]), holds[0])
+    result[heights[-1][:, None] < targets] = UNREACHABLE
+    return np.moveaxis(result.reshape(shape + (len(targets),)), -1, 0)
+
+
+class JumpTable:
+    """
+    Times of single and double jumps with the first jump held as long as possible,
+    as (height, vertical speed, up component), the height and time of their highest point,
+    as (single or double jump, vertical speed, up component), and hold durations of single jumps,
+    as (height, time, vertical speed, up component). Values outside of the grid are clamped to it.
+    Heights a jump doesn't reach are stored with the time of its highest point, so that interpolating
+    next to them stays finite, and `time_to_height` compares with the highest point instead.
+    """
+
+    def __init__(self, single_jump_times: np.ndarray, double_jump_times: np.ndarray, apex_heights: np.ndarray,
+                 apex_times: np.ndarray, holds: np.ndarray):
+        self.single_jump_times = single_jump_times
+        self.double_jump_times = double_jump_times
+        self.apex_heights = apex_heights
+        self.apex_times = apex_times
+        self.holds = holds
+
+    def time_to_height(self, heights, vertical_speeds=0.0, up_components=1.0, double_jump=False) -> np.ndarray:
+        """
+        Time a jump needs to rise by `heights`, with the first jump held as long as possible.
+        Infinite for heights above the highest point of the jump. The arguments are broadcast against each other.
+        """
+        times = self.double_jump_times if double_jump else self.single_jump_times
+        times = interpolate([HEIGHTS, VERTICAL_SPEEDS, UP_COMPONENTS], times, [heights, vertical_speeds, up_components])
+        highest = interpolate([VERTICAL_SPEEDS, UP_COMPONENTS], self.apex_heights[int(double_jump)],
+                              [vertical_speeds, up_components])
+        return np.where(np.asarray(heights) > highest, np.inf, times)
+
+    def apex_time(self, vertical_speeds=0.0, up_components=1.0, double_jump=False) -> np.ndarray:
+        """Time at which a jump with the first jump held as long as possible reaches its highest point."""
+        return interpolate([VERTICAL_SPEEDS, UP_COMPONENTS], self.apex_times[int(double_jump)],
+                           [vertical_speeds, up_components])
+
+    def hold_duration(self, heights, times, vertical_speeds=0.0, up_components=1.0) -> np.ndarray:
+        """
+        Shortest time to hold a single jump so that the car has risen by `heights` after `times`.
+        More than MAX_HOLD_DURATION when the car can't get that high that soon.
+        """
+        return interpolate([HEIGHTS, TIMES, VERTICAL_SPEEDS, UP_COMPONENTS], self.holds,
+                           [heights, times, vertical_speeds, up_components])
+
+
+def generate() -> JumpTable:
+    vertical_speeds = VERTICAL_SPEEDS[:, None]
+    up_components = UP_COMPONENTS[None, :]
+
+    single_jumps = simulate_heights(MAX_HOLD_DURATION, np.inf, vertical_speeds, up_components)
+    double_jumps = simulate_heights(MAX_HOLD_DURATION, MAX_HOLD_DURATION + SECOND_JUMP_DELAY,
+                                    vertical_speeds, up_components)
+    jumps = np.stack([single_jumps, double_jumps])
+    apex_heights = np.max(jumps, axis=-1)
+    apex_times = np.argmax(jumps, axis=-1) * SIMULATION_DT
+    single_jump_times, double_jump_times = [
+        np.moveaxis(np.minimum(time_to_height(heights, HEIGHTS), apexes[..., None]), -1, 0)
+        for heights, apexes in zip(jumps, apex_times)
+    ]
+
+    held_jumps = simulate_heights(HOLDS[:, None, None], np.inf, vertical_speeds, up_components)
+    ticks = np.round(TIMES / SIMULATION_DT).astype(int)
+    heights_at_times = np.moveaxis(held_jumps[..., ticks], -1, 1)  # (hold, time, vertical speed, up component)
+    holds = shortest_holds(heights_at_times, HOLDS, HEIGHTS)
+
+    return JumpTable(single_jump_times, double_jump_times, apex_heights, apex_times, holds)
+
+
+JUMP_TABLE = generate()
+
 
 if __name__ == "__main__":
     import matplotlib.pyplot as plt
 
-    # Setup
-    initial_pos = vec3(0.0, 0.0, 0.0)
-    initial_vel = vec3(0.0, 0.0, 0.0)
-    orientation = Orientation(
-        vec3(1.0, 0.0, 0.0),
-        vec3(0.0, 1.0, 0.0),
-        vec3(0.0, 0.0, 1.0)
-    )
-    dt = 1.0 / 120.0
-       
-    times = [0.0]
-    heights = [0.0]
-
-    jump_sim = JumpSim(initial_pos, initial_vel, orientation, 0.2, 0.2 + dt)
-    max_height = 0.0
-    max_height_time = 0.0
-    while not jump_sim.done:
-        jump_sim.step(dt)
-        times.append(jump_sim.timer)
-        heights.append(jump_sim.position[2])
-
-        if jump_sim.position[2] > max_height:
-            max_height = jump_sim.position[2]
-            max_height_time = jump_sim.timer
-        else:
-            break
-
-    plt.plot(heights, times)
-    plt.scatter([max_height], [max_height_time])
-
-    def f(x):
-        a = 1.872348977E-8
-        b = -1.126747937E-5
-        c = 3.560647225E-3
-        d = -7.446058499E-3
-        return a * x**3 + b * x**2 + c * x + d
-
-    def g(x):
-        a = 4.448405035E-11
-        b = -2.688967668E-8
-        c = 3.678194738E-6
-        d = 1.908793073E-3
-        e = 2.870888799E-2
-        return a * x**4 + b * x**3 + c * x**2 + d * x + e
-
-    x = linspace(0, 500, 100)
-    y1 = [f(x_i) for x_i in x]
-    y2 = [g(x_i) for x_i in x]
-
-    # plt.plot(x, y1)
-    # plt.plot(x, y2)
-
-    for i, ii in zip(heights, times):
-        print(i, "\t", ii)
-
+    times = np.arange(int(round(SIMULATION_TIME / SIMULATION_DT)) + 1) * SIMULATION_DT
+    for hold in (0.05, 0.1, MAX_HOLD_DURATION):
+        plt.plot(times, simulate_heights(hold, np.inf, 0.0, 1.0), label=f"single jump, hold {hold:.2f}s")
+    plt.plot(times, simulate_heights(MAX_HOLD_DURATION, MAX_HOLD_DURATION + SECOND_JUMP_DELAY, 0.0, 1.0),
+             label="double jump")
+    plt.xlabel("time")
+    plt.ylabel("height")
+    plt.legend()
     plt.show()
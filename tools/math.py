@@ -1,3 +1,8 @@
+import math
+from typing import List, Optional
+
+import numpy as np
+
 
 def sign(x) -> int:
     return 1 if x >= 0 else -1
@@ -23,5 +28,45 @@ def nonzero(value) -> float:
     return max(value, 0.000001)
 
 
+def first_root(c0: float, c1: float, c2: float, start: float, end: float) -> Optional[float]:
+    """First time in [start, end] where c0 + c1 t + c2 t^2 <= 0, None if there's none."""
+    if c0 + c1 * start + c2 * start ** 2 <= 0:
+        return start
+
+    if c2 == 0:
+        roots = [-c0 / c1] if c1 != 0 else []
+    else:
+        discriminant = c1 ** 2 - 4 * c2 * c0
+        if discriminant < 0:
+            return None
+        root = math.sqrt(discriminant)
+        roots = [(-c1 - root) / (2 * c2), (-c1 + root) / (2 * c2)]
+
+    return min((t for t in roots if start < t <= end), default=None)
+
+
 def range_map(x, in_min, in_max, out_min, out_max):
     return (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
+
+
+def interpolate(axes: List[np.ndarray], values: np.ndarray, coordinates: List[np.ndarray]) -> np.ndarray:
+    """Multilinear interpolation on a grid, for arrays of coordinates broadcast against each other."""
+    coordinates = np.broadcast_arrays(*[np.asarray(x, dtype=np.float64) for x in coordinates])
+    shape = coordinates[0].shape
+
+    lower_indices, weights = [], []
+    for axis, x in zip(axes, coordinates):
+        i = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2)
+        weights.append(np.clip((x - axis[i]) / (axis[i + 1] - axis[i]), 0, 1))
+        lower_indices.append(i)
+
+    result = np.zeros(shape)
+    for corner in range(2 ** len(axes)):
+        corner_weight = np.ones(shape)
+        corner_indices = []
+        for axis_index, (i, t) in enumerate(zip(lower_indices, weights)):
+            upper = (corner >> axis_index) & 1
+            corner_weight = corner_weight * (t if upper else 1 - t)
+            corner_indices.append(i + upper)
+        result += corner_weight * values[tuple(corner_indices)]
+    return result
@@ -0,0 +1,136 @@
+"""
+Intercept predicates that `Intercept` can evaluate for the whole ball prediction at once, as a NumPy mask,
+instead of calling them for every slice. Combine them with `&`:
+
+    intercept_predicate = HeightBand(high=300) & BallSpeed(maximum=2000)
+
+They can still be called like plain predicate functions, with a car and a ball.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from typing import Sequence, Optional
+
+import numpy as np
+
+from rlutilities.simulation import Car, Ball
+from tools.arena import Arena
+from tools.ball_prediction import BallPrediction
+from tools.jump_sim import JUMP_TABLE
+
+
+class Predicate(ABC):
+
+    @abstractmethod
+    def evaluate(self, car: Car, times: np.ndarray, positions: np.ndarray,
+                 velocities: np.ndarray) -> np.ndarray:
+        """Boolean array telling which of the slices, given as arrays, are accepted for the car."""
+
+    def mask(self, car: Car, ball_predictions: BallPrediction) -> np.ndarray:
+        n = len(ball_predictions)
+        return self.evaluate(car, ball_predictions.time[:n], ball_predictions.position[:n],
+                             ball_predictions.velocity[:n])
+
+    def __call__(self, car: Car, ball: Ball) -> bool:
+        position, velocity = ball.position, ball.velocity
+        return bool(self.evaluate(car, np.array([ball.time]),
+                                  np.array([[position[0], position[1], position[2]]]),
+                                  np.array([[velocity[0], velocity[1], velocity[2]]]))[0])
+
+    def __and__(self, other: "Predicate") -> "Predicate":
+        return AllOf(self, other)
+
+
+class AllOf(Predicate):
+
+    def __init__(self, *predicates: Predicate):
+        self.predicates = []
+        for predicate in predicates:
+            self.predicates += predicate.predicates if isinstance(predicate, AllOf) else [predicate]
+
+    def evaluate(self, car, times, positions, velocities):
+        mask = np.ones(len(times), dtype=bool)
+        for predicate in self.predicates:
+            mask &= predicate.evaluate(car, times, positions, velocities)
+        return mask
+
+
+class HeightBand(Predicate):
+    """Ball height strictly between `low` and `high`."""
+
+    def __init__(self, low: float = -math.inf, high: float = math.inf):
+        self.low = low
+        self.high = high
+
+    def evaluate(self, car, times, positions, velocities):
+        heights = positions[:, 2]
+        return (self.low < heights) & (heights < self.high)
+
+
+class JumpReach(Predicate):
+    """
+    Ball low enough for a single or double jump from the car's current state to rise to it,
+    as simulated in tools/jump_sim.py. A car on flat ground rises by about 230 with a single jump
+    and by about 490 with a double jump, more when it jumps while driving up a ramp.
+    """
+
+    def __init__(self, double_jump: bool = False):
+        self.double_jump = double_jump
+
+    def evaluate(self, car, times, positions, velocities):
+        rises = positions[:, 2] - car.position[2]
+        times_needed = JUMP_TABLE.time_to_height(rises, car.velocity[2], car.orientation[2, 2], self.double_jump)
+        return np.isfinite(times_needed)
+
+
+class MinimumTime(Predicate):
+    """
+    The slice has to be more than some time ahead of the car, which changes linearly with ball height,
+    from `low_time` at `low_height` to `high_time` at `high_height`.
+    """
+
+    def __init__(self, low_height: float, high_height: float, low_time: float, high_time: float):
+        self.low_height = low_height
+        self.high_height = high_height
+        self.low_time = low_time
+        self.high_time = high_time
+
+    def evaluate(self, car, times, positions, velocities):
+        slope = (self.high_time - self.low_time) / (self.high_height - self.low_height)
+        required_times = (positions[:, 2] - self.low_height) * slope + self.low_time
+        return times - car.time > required_times
+
+
+class SurfaceDistance(Predicate):
+    """Distance of the ball center to the closest of the given arena surfaces strictly between the limits."""
+
+    def __init__(self, minimum: float = -math.inf, maximum: float = math.inf,
+                 surfaces: Sequence[str] = Arena.SURFACES):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.surfaces = surfaces
+
+    def evaluate(self, car, times, positions, velocities):
+        distances, _ = Arena.surface_distances(positions, self.surfaces)
+        return (self.minimum < distances) & (distances < self.maximum)
+
+
+class BallSpeed(Predicate):
+    """
+    Ball speed strictly between the limits. If `normal_to` surfaces are given, only the speed along the normal
+    of the closest one of them counts, so that a ball rolling along a surface has zero speed.
+    """
+
+    def __init__(self, minimum: float = -math.inf, maximum: float = math.inf,
+                 normal_to: Optional[Sequence[str]] = None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.normal_to = normal_to
+
+    def evaluate(self, car, times, positions, velocities):
+        if self.normal_to is None:
+            speeds = np.linalg.norm(velocities, axis=1)
+        else:
+            _, normals = Arena.surface_distances(positions, self.normal_to)
+            speeds = np.abs(np.einsum("ij,ij->i", velocities, normals))
+        return (self.minimum < speeds) & (speeds < self.maximum)
@@ -0,0 +1,163 @@
+"""
+Reach times of a car driving forwards as fast as it can, measured by simulating the bot's own Drive maneuver
+with RLUtilities, stored over a grid of (distance to target, angle to target, forward speed, boost).
+The table replaces the hand-tuned `estimate_time` heuristic for such driving once it has been generated:
+
+    python -m tools.reach_table
+
+This writes reach_table.npz next to this file, which is loaded when the bot starts.
+"""
+
+import math
+import os
+from typing import List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+# the lookup only needs NumPy, RLUtilities is imported where the table is generated
+if TYPE_CHECKING:
+    from rlutilities.linear_algebra import vec3
+    from rlutilities.simulation import Car
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reach_table.npz")
+
+DISTANCES = np.array([0, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 5000, 6500, 8000], dtype=np.float32)
+ANGLES = np.linspace(0, math.pi, 9, dtype=np.float32)
+SPEEDS = np.array([0, 500, 1000, 1400, 1800, 2300], dtype=np.float32)
+BOOSTS = np.array([0, 15, 35, 60, 100], dtype=np.float32)
+
+# the car has reached the target when it gets this close, same as Drive.finished
+REACH_DISTANCE = 100
+SIMULATION_DT = 1 / 120
+SIMULATION_TIME_LIMIT = 10.0
+BOOST_USAGE = 33.3  # per second
+
+
+class ReachTable:
+    """Multilinear interpolation of the reach time table, evaluated for whole arrays at once."""
+
+    def __init__(self, distances: np.ndarray, angles: np.ndarray, speeds: np.ndarray, boosts: np.ndarray,
+                 times: np.ndarray):
+        self.axes = [distances, angles, speeds, boosts]
+        self.times = times.astype(np.float64)
+        assert self.times.shape == tuple(len(axis) for axis in self.axes), "Reach table doesn't match its axes"
+
+    @classmethod
+    def load(cls, path: str = TABLE_PATH) -> Optional["ReachTable"]:
+        """The table stored at `path`, or None if it hasn't been generated."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as table:
+            return cls(table["distances"], table["angles"], table["speeds"], table["boosts"], table["times"])
+
+    def save(self, path: str = TABLE_PATH):
+        distances, angles, speeds, boosts = self.axes
+        np.savez_compressed(path, distances=distances, angles=angles, speeds=speeds, boosts=boosts,
+                            times=self.times.astype(np.float32))
+
+    def lookup(self, distances, angles, speeds, boosts) -> np.ndarray:
+        """
+        Interpolated reach times, the arguments are broadcast against each other.
+        Values outside of the grid are clamped to it, except for distance, which is extrapolated
+        from the last two grid points, as the car is cruising by then.
+        """
+        coordinates = [np.asarray(x, dtype=np.float64) for x in (distances, angles, speeds, boosts)]
+        coordinates = np.broadcast_arrays(*coordinates)
+
+        lower_indices, weights = [], []
+        for axis_index, (axis, x) in enumerate(zip(self.axes, coordinates)):
+            i = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2)
+            t = (x - axis[i]) / (axis[i + 1] - axis[i])
+            weights.append(np.maximum(t, 0) if axis_index == 0 else np.clip(t, 0, 1))
+            lower_indices.append(i)
+
+        # sum over the 16 corners of the surrounding grid cell
+        result = np.zeros(coordinates[0].shape)
+        for corner in range(16):
+            corner_weight = np.ones(coordinates[0].shape)
+            corner_indices = []
+            for axis_index in range(4):
+                upper = (corner >> axis_index) & 1
+                t = weights[axis_index]
+                corner_weight = corner_weight * (t if upper else 1 - t)
+                corner_indices.append(lower_indices[axis_index] + upper)
+            result += corner_weight * self.times[tuple(corner_indices)]
+        return result
+
+    def car_times(self, cars: List["Car"], targets: np.ndarray) -> np.ndarray:
+        """Reach time of every car to every target, as an (n_cars x n_targets) array."""
+        positions = np.array([[car.position[0], car.position[1], car.position[2]] for car in cars])
+        velocities = np.array([[car.velocity[0], car.velocity[1], car.velocity[2]] for car in cars])
+        forwards = np.array([[f[0], f[1], f[2]] for f in (car.forward() for car in cars)])
+        boosts = np.array([car.boost for car in cars], dtype=np.float64)
+
+        to_targets = targets[np.newaxis, :, :] - positions[:, np.newaxis, :]
+        distances = np.linalg.norm(to_targets, axis=2)
+        cos_angles = np.einsum("ntk,nk->nt", to_targets, forwards) / np.maximum(distances, 1e-9)
+        angles = np.arccos(np.clip(cos_angles, -1, 1))
+        forward_speeds = np.einsum("nk,nk->n", velocities, forwards)
+
+        return self.lookup(distances, angles, forward_speeds[:, np.newaxis], boosts[:, np.newaxis])
+
+    def car_time(self, car: "Car", target: "vec3") -> float:
+        return float(self.car_times([car], np.array([[target[0], target[1], target[2]]]))[0, 0])
+
+
+def simulate_reach_time(distance: float, angle: float, speed: float, boost: float) -> float:
+    """Time it takes Drive to get a car within REACH_DISTANCE of a target, SIMULATION_TIME_LIMIT if it doesn't."""
+    # imported here, so that the bot itself doesn't depend on the maneuvers package through this module
+    from maneuvers.driving.drive import Drive
+    from rlutilities.linear_algebra import vec3, look_at, norm
+    from rlutilities.simulation import Car
+
+    if distance < REACH_DISTANCE:
+        return 0.0
+
+    # the target is straight ahead along the y axis, centered on the field so that both stay inside it
+    target = vec3(0, distance / 2, 17)
+    forward = vec3(math.sin(angle), math.cos(angle), 0)
+
+    car = Car()
+    car.position = vec3(0, -distance / 2, 17.01)
+    car.velocity = forward * speed
+    car.angular_velocity = vec3(0, 0, 0)
+    car.orientation = look_at(forward, vec3(0, 0, 1))
+    car.boost = int(boost)
+    car.on_ground = True
+    car.time = 0.0
+
+    # boost isn't depleted by the RLUtilities car simulation (see AerialStrike), keep track of it here
+    drive = Drive(car, target, 2300)
+    while car.time < SIMULATION_TIME_LIMIT:
+        drive.step(SIMULATION_DT)
+        if drive.controls.boost:
+            boost = max(boost - BOOST_USAGE * SIMULATION_DT, 0)
+        car.boost = int(boost)
+        car.step(drive.controls, SIMULATION_DT)
+        if norm(car.position - target) < REACH_DISTANCE:
+            return car.time
+
+    return SIMULATION_TIME_LIMIT
+
+
+def generate() -> ReachTable:
+    times = np.zeros((len(DISTANCES), len(ANGLES), len(SPEEDS), len(BOOSTS)), dtype=np.float32)
+    for i, distance in enumerate(DISTANCES):
+        print(f"distance {distance:.0f}")
+        for j, angle in enumerate(ANGLES):
+            for k, speed in enumerate(SPEEDS):
+                for m, boost in enumerate(BOOSTS):
+                    times[i, j, k, m] = simulate_reach_time(float(distance), float(angle), float(speed), float(boost))
+
+    # more boost never makes the car slower, smooth out simulation noise that says otherwise
+    times = np.minimum.accumulate(times, axis=3)
+    return ReachTable(DISTANCES, ANGLES, SPEEDS, BOOSTS, times)
+
+
+if __name__ == "__main__":
+    from rlutilities.simulation import Game
+
+    Game.set_mode("soccar")
+    table = generate()
+    table.save()
+    print(f"saved to {TABLE_PATH}")
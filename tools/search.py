@@ -0,0 +1,59 @@
+from typing import Callable, Optional
+
+
+def bracket_first_positive(value: Callable[[int], float], n: int, stride: int) -> int:
+    """
+    Position of the first of `n` values that is positive, or `n` if there isn't any,
+    for values that don't decrease with their position.
+    Every `stride`-th value is tested until one is positive, then the values since the previous sample
+    are scanned in order. If the samples show that the values do decrease, 0 is returned, to scan everything.
+    Values that rise above 0 and fall back between two samples are missed, so for values that aren't
+    known to be non-decreasing, the result can be later than the first positive one.
+    """
+    if n == 0:
+        return 0
+
+    previous_k, previous_value = -1, -float("inf")
+    k = 0
+    while True:
+        k_value = value(k)
+        if k_value > 0:
+            break
+        if k_value < previous_value:
+            return 0
+        if k == n - 1:
+            return n
+        previous_k, previous_value = k, k_value
+        k = min(k + stride, n - 1)
+
+    # the first positive value is in (previous_k, k]
+    return next((j for j in range(previous_k + 1, k) if value(j) > 0), k)
+
+
+def sample_first_true(test: Callable[[int], bool], start: int, end: int, stride: int) -> Optional[int]:
+    """
+    First index in [start, end) for which `test` is true, or None.
+    Every `stride`-th index (and the last one) is tested, and the indices before the first one that passes are
+    tested in order. So a run of true indices that lies between two samples is missed.
+    """
+    previous = start - 1
+    for i in list(range(start, end, stride)) + [end - 1]:
+        if i <= previous:
+            continue
+        if test(i):
+            return next((j for j in range(previous + 1, i) if test(j)), i)
+        previous = i
+    return None
+
+
+def sample_first_true_from_hint(test: Callable[[int], bool], end: int, stride: int,
+                                hint: Optional[int]) -> Optional[int]:
+    """
+    `sample_first_true` over [0, end), where `hint` is an index that was true before and might still be.
+    If it is, it's the last index searched, so a run of true indices that was found before isn't lost between
+    the samples. The indices before it are always searched, so the result is the same as without the hint,
+    or earlier when the samples would have missed the run of the hint.
+    """
+    if hint is not None and hint < end and test(hint):
+        return sample_first_true(test, 0, hint + 1, stride)
+    return sample_first_true(test, 0, end, stride)
@@ -0,0 +1,218 @@
+import mmap
+import os
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from rlutilities.simulation import Car
+from tools.ball_prediction import BallPrediction
+from tools.game_info import GameInfo
+from tools.intercept import reach_times
+
+
+class SharedPrediction:
+    """
+    Ball prediction and reach times of all cars in shared memory, published every tick by one bot of a team,
+    so the other bots of the team, running in their own processes, don't have to compute them too.
+
+    The segment is a memory mapping, named on Windows and backed by a file in the temp directory elsewhere.
+    The bot that creates the lock file next to it becomes the publisher.
+
+    The segment has two slots. The publisher writes into the inactive one and then activates it.
+    Readers use the active slot in place, as a read-only view, and check its sequence number like a seqlock:
+    the view is only used while the sequence number is the one it was read with, every `valid` check
+    and every `GameInfo.predict_ball` call reads again otherwise. The publisher starts rewriting a slot
+    two publishes after activating it, so that only happens when a reader's tick takes longer than a whole
+    tick of the publisher. Readers fall back to computing everything themselves when nothing recent was published.
+
+    Segments are named after the team and the process that started the bots, so bots in different matches
+    on the same host don't share a prediction. When the publisher hasn't published for STALE_TIME seconds,
+    e.g. because it crashed, the next bot to connect takes over the segment as its publisher.
+    """
+
+    CAPACITY = 1024
+    MAX_CARS = 8
+
+    # the publisher might run later in the tick than a reader, so the previous tick's prediction is accepted
+    MAX_AGE = 1 / 60
+
+    # wall-clock seconds without a publish after which a segment is considered abandoned
+    STALE_TIME = 5.0
+
+    # header: active slot, wall-clock time of the last publish (or of the creation)
+    # slot meta: sequence (odd while writing), number of slices, number of cars, ball time, latest touch time
+    _HEADER = 2
+    _META = 5
+
+    def __init__(self, name: str, create: bool):
+        self.name = name
+        self.publisher = create
+
+        slot_size = self._META + 2 * self.MAX_CARS + self.CAPACITY * (BallPrediction.COLUMNS + self.MAX_CARS)
+        size = self._HEADER + 2 * slot_size
+
+        # raises FileExistsError if another bot is the publisher already
+        if create:
+            os.close(os.open(self._path(name, ".lock"), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        try:
+            self._memory = self._map(name, size * 8)
+        except OSError:
+            if create:
+                os.remove(self._path(name, ".lock"))
+            raise
+
+        buffer = np.ndarray(size, dtype=np.float64, buffer=self._memory)
+        if create:
+            buffer[1] = time.time()
+
+        self._header = buffer[:self._HEADER]
+        self._slots = [self._slot(buffer[self._HEADER + i * slot_size:self._HEADER + (i + 1) * slot_size])
+                       for i in range(2)]
+        self._viewed: Optional[Tuple[np.ndarray, float]] = None
+
+    @staticmethod
+    def _path(name: str, suffix: str = "") -> str:
+        return os.path.join(tempfile.gettempdir(), name + suffix)
+
+    @classmethod
+    def _map(cls, name: str, size: int) -> mmap.mmap:
+        """Map the segment, creating it zeroed if it doesn't exist yet."""
+        if os.name == "nt":
+            # lives in the paging file as long as one of the bots has it open
+            return mmap.mmap(-1, size, tagname=name)
+
+        fd = os.open(cls._path(name), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # growing the file fills it with zeros, so it doesn't matter which bot gets here first
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            return mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def _slot(self, buffer: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Meta, car ids, car times, slices and reach times of a slot."""
+        cars_end = self._META + 2 * self.MAX_CARS
+        slices_end = cars_end + self.CAPACITY * BallPrediction.COLUMNS
+        return (
+            buffer[:self._META],
+            buffer[self._META:self._META + self.MAX_CARS],
+            buffer[self._META + self.MAX_CARS:cars_end],
+            buffer[cars_end:slices_end].reshape(self.CAPACITY, BallPrediction.COLUMNS),
+            buffer[slices_end:].reshape(self.MAX_CARS, self.CAPACITY),
+        )
+
+    @staticmethod
+    def segment_name(team: int) -> str:
+        """All bots of a match are started by the same process, bots of other matches by another one."""
+        return f"BotimusPrediction{os.getppid()}_{team}"
+
+    @classmethod
+    def connect(cls, name: str) -> Optional["SharedPrediction"]:
+        """
+        The first bot of a team to connect becomes the publisher, the others read.
+        If the publisher stopped publishing, this bot takes over instead.
+        None if the segment can't be mapped.
+        """
+        try:
+            return cls(name, create=True)
+        except FileExistsError:
+            pass
+        except OSError:
+            return None
+
+        try:
+            shared = cls(name, create=False)
+        except OSError:
+            return None
+        if not shared.stale():
+            return shared
+
+        shared.close()
+        try:
+            os.remove(cls._path(name, ".lock"))
+        except OSError:
+            pass
+        try:
+            return cls(name, create=True)
+        except FileExistsError:  # another bot took over first
+            return cls(name, create=False)
+        except OSError:
+            return None
+
+    def stale(self) -> bool:
+        return time.time() - self._header[1] > self.STALE_TIME
+
+    def close(self):
+        self._header = self._slots = self._viewed = None
+        if self.publisher:
+            for path in (self._path(self.name, ".lock"), self._path(self.name)):
+                try:
+                    os.remove(path)
+                except OSError:  # the segment of a named mapping isn't a file
+                    pass
+        try:
+            self._memory.close()
+        except BufferError:  # a prediction still views the segment, it's unmapped once that's gone
+            pass
+
+    def publish(self, info: GameInfo):
+        """Publish the current prediction of `info`, along with the reach times of all cars."""
+        predictions = info.ball_predictions
+        n = min(len(predictions), self.CAPACITY)
+        cars: List[Car] = [info.cars[i] for i in range(min(info.num_cars, self.MAX_CARS))]
+
+        slot = 1 - int(self._header[0])
+        meta, car_ids, car_times, slices, reach = self._slots[slot]
+        meta[0] += 1
+        slices[:n] = predictions.data[:n]
+        if cars:
+            reach[:len(cars), :n] = reach_times(cars, predictions)[:, :n]
+        car_ids[:len(cars)] = [car.id for car in cars]
+        car_times[:len(cars)] = [car.time for car in cars]
+        meta[1:] = n, len(cars), info.ball.time, info.latest_touch_time
+        meta[0] += 1
+        self._header[:] = slot, time.time()
+
+    def read(self, info: GameInfo) -> bool:
+        """
+        Let the prediction of `info` view the published one, if it's recent and the ball hasn't been touched since.
+        The published slices that have already elapsed are skipped.
+        Returns False if there's no such prediction.
+        """
+        self._viewed = None
+        predictions = info.ball_predictions
+        if predictions.is_view:
+            predictions.clear()
+
+        meta, car_ids, car_times, slices, reach = self._slots[int(self._header[0])]
+        sequence, n, car_count, ball_time, touch_time = meta
+        if (
+            sequence % 2 == 1
+            or n == 0
+            or not 0 <= info.ball.time - ball_time <= self.MAX_AGE
+            or touch_time != info.latest_touch_time
+            or self.stale()
+        ):
+            return False
+
+        n, car_count = min(int(n), self.CAPACITY), min(int(car_count), self.MAX_CARS)
+        start = int(np.searchsorted(slices[:n, 0], info.ball.time, side="right"))
+        predictions.view(slices[start:n])
+        for i in range(car_count):
+            row = reach[i, start:n]
+            row.flags.writeable = False
+            predictions.known_reach_times[(int(car_ids[i]), car_times[i])] = row
+
+        # the publisher started writing this slot again while we were setting up the view
+        self._viewed = meta, sequence
+        if not self.valid():
+            predictions.clear()
+            return False
+        return True
+
+    def valid(self) -> bool:
+        """Whether the slot of the last successful `read` still holds what was read."""
+        return self._viewed is not None and self._viewed[0][0] == self._viewed[1]
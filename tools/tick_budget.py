@@ -0,0 +1,102 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class TickBudget:
+    """
+    Measures how long each phase of a tick takes, and decides which optional work to leave out
+    when ticks take longer than the budget.
+
+    Single slow ticks are expected, e.g. when a maneuver is planned, so the level follows a moving average
+    of the tick durations instead. Degradations are switched on one at a time in the order of DEGRADATIONS,
+    while the average is over budget, at most once every ESCALATION_TICKS ticks, and switched off again
+    in reverse order after RECOVERY_TICKS ticks with the average well under budget.
+    `degrades` tells whether a degradation is active, and counts how often it was applied.
+    """
+
+    BUDGET = 1 / 120 * 0.75  # seconds, leaves room for the framework at 120 Hz
+    AVERAGE_WEIGHT = 0.05  # of the latest tick in the moving average, about the last 20 ticks count
+    ESCALATION_TICKS = 30
+    RECOVERY_FRACTION = 0.5
+    RECOVERY_TICKS = 120
+    REPORT_TICKS = 120 * 60
+
+    PACKET = "packet"
+    PREDICTION = "prediction"
+    STRATEGY = "strategy"
+    MANEUVERS = "maneuvers"
+    RENDERING = "rendering"
+    COLLISIONS = "collisions"
+
+    SKIP_RENDERING = "skip rendering"
+    SHORTEN_PREDICTION = "shorten prediction"
+    POSTPONE_INTERCEPT_REFRESH = "postpone intercept refresh"
+    REUSE_COLLISIONS = "reuse collisions"
+    DEGRADATIONS = (SKIP_RENDERING, SHORTEN_PREDICTION, POSTPONE_INTERCEPT_REFRESH, REUSE_COLLISIONS)
+
+    def __init__(self, budget: float = BUDGET):
+        self.budget = budget
+        self.level = 0
+        self.average_tick_time = 0.0
+
+        self.ticks = 0
+        self.ticks_over_budget = 0
+        self.phase_times: Dict[str, float] = {}
+        self.max_phase_times: Dict[str, float] = {}
+        self.degradation_counts: Dict[str, int] = {degradation: 0 for degradation in self.DEGRADATIONS}
+
+        self._tick_start = 0.0
+        self._ticks_under_budget = 0
+        self._ticks_since_escalation = 0
+
+    def start_tick(self):
+        self._tick_start = time.perf_counter()
+        self.phase_times.clear()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + elapsed
+            self.max_phase_times[name] = max(self.max_phase_times.get(name, 0.0), self.phase_times[name])
+
+    def end_tick(self):
+        elapsed = time.perf_counter() - self._tick_start
+        self.ticks += 1
+        self._ticks_since_escalation += 1
+        if elapsed > self.budget:
+            self.ticks_over_budget += 1
+
+        self.average_tick_time += (elapsed - self.average_tick_time) * self.AVERAGE_WEIGHT
+
+        if self.average_tick_time > self.budget:
+            self._ticks_under_budget = 0
+            if self._ticks_since_escalation >= self.ESCALATION_TICKS:
+                self._ticks_since_escalation = 0
+                self.level = min(self.level + 1, len(self.DEGRADATIONS))
+
+        elif self.average_tick_time < self.budget * self.RECOVERY_FRACTION:
+            self._ticks_under_budget += 1
+            if self._ticks_under_budget >= self.RECOVERY_TICKS:
+                self._ticks_under_budget = 0
+                self.level = max(self.level - 1, 0)
+
+    def degrades(self, degradation: str) -> bool:
+        if self.DEGRADATIONS.index(degradation) < self.level:
+            self.degradation_counts[degradation] += 1
+            return True
+        return False
+
+    def report_due(self) -> bool:
+        """Whether it's time for a periodic report, about once per minute."""
+        return self.ticks > 0 and self.ticks % self.REPORT_TICKS == 0
+
+    def report(self) -> str:
+        phases = ", ".join(f"{name} {duration * 1000:.1f} ms" for name, duration in self.max_phase_times.items())
+        degradations = ", ".join(f"{name} {count}x" for name, count in self.degradation_counts.items())
+        return (f"{self.ticks_over_budget} of {self.ticks} ticks over budget. "
+                f"Slowest phases: {phases}. Degradations: {degradations}.")